@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Timing of the dice hot paths. Each benchmark is run with timeit,
+enough times to last about 0.2 second, the best of several repeats is
+kept as the time of one call. Results are written as JSON and
+compared with a baseline, a benchmark slower than the baseline by
+more than the threshold is a regression.
+
+    python benchmarks/bench_yze.py -o results.json
+    python benchmarks/bench_yze.py --save-baseline
+
+Pool benchmarks are cumulative: a push benchmark builds, throws and
+pushes the pool. Startup benchmarks are the import time of a command
+module in a new interpreter, each one has to stay within
+STARTUP_BUDGET whatever the baseline.
+"""
+
+from yze.dice import (AlienDicePool, BladeRunnerDicePool, FBLDicePool, MutantDicePool,
+                      SimpleDie, Twilight2000DicePool)
+from yze import benchmark_mutant, cli, exact
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+# cumulative import time of a command module, in seconds
+STARTUP_BUDGET = 0.05
+
+
+def pool_benchmarks():
+    """Construction, throw, push and multipush of every pool class.
+    """
+    pools = {
+        'mutant': lambda: MutantDicePool(attr=3, skill=2, gear=1),
+        'fbl': lambda: FBLDicePool(attr=3, skill=2, gear=1, artefact=8),
+        'alien': lambda: AlienDicePool(pool=5, stress=2),
+        't2k': lambda: Twilight2000DicePool(attr='B', skill='C', ammo=3),
+        'blade_runner': lambda: BladeRunnerDicePool(attr='A', skill='C', advantage=True),
+    }
+    benchmarks = {}
+    for name, make in pools.items():
+        benchmarks[f'{name}.new'] = make
+        benchmarks[f'{name}.throw'] = lambda make=make: make().throw()
+
+        def push(make=make):
+            pool = make()
+            pool.throw()
+            pool.push()
+        benchmarks[f'{name}.push'] = push
+        if hasattr(make(), 'multipush'):
+            def multipush(make=make):
+                pool = make()
+                pool.throw()
+                pool.push()
+                pool.multipush()
+            benchmarks[f'{name}.multipush'] = multipush
+    return benchmarks
+
+
+def sweep(throws, exact_odds=False, attributes=range(1, 6)):
+    """Complete list of benchmark_mutant without cache, exact
+    distributions being computed again on every call.
+    """
+    exact.mutant_distribution.cache_clear()
+    configs = benchmark_mutant.complete_configs(attributes)
+    for row in benchmark_mutant.complete_benchmark(throws, exact_odds, configs=configs):
+        pass
+
+
+def all_benchmarks():
+    """Every benchmark by name, a callable without arguments.
+    """
+    die = SimpleDie()
+    benchmarks = {'simple_die.throw': die.throw}
+    benchmarks.update(pool_benchmarks())
+    benchmarks['multiple_throws_python.1000'] = \
+        lambda: benchmark_mutant.multiple_throws_python(1000, 3, 2, 1)
+    benchmarks['multiple_throws.100000'] = lambda: benchmark_mutant.multiple_throws(100000, 3, 2, 1)
+    benchmarks['sweep.exact.small'] = lambda: sweep(None, True, range(1, 3))
+    benchmarks['sweep.exact.complete'] = lambda: sweep(None, True)
+    benchmarks['sweep.1000'] = lambda: sweep(1000)
+    benchmarks['sweep.10000'] = lambda: sweep(10000)
+    return benchmarks
+
+
+def import_time(module):
+    """Seconds of the cumulative import of <module> in a new
+    interpreter, as reported by python -X importtime.
+    """
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         capture_output=True, text=True, check=True).stderr
+    for line in err.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, cumulative, name = line[len('import time:'):].split('|')
+            if name.strip() == module:
+                return int(cumulative) / 1e6
+    raise ValueError(f'no import time for {module}')
+
+
+def startup_modules():
+    """Command module of every startup benchmark by name, the server
+    being left out as it loads asyncio on purpose.
+    """
+    return {f'startup.{name}': module for name, (module, description) in cli.COMMANDS.items()
+            if name != 'server'}
+
+
+def measure(func, repeat=5, duration=0.2):
+    """Seconds of one call of <func>, the best of <repeat> runs.
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * duration / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(names=None, repeat=5):
+    """Measure the benchmarks whose name starts with one of <names>, or
+    all of them. Returns {name: seconds}.
+    """
+    results = {}
+    for name, func in all_benchmarks().items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        results[name] = measure(func, repeat)
+        print(f'{name}: {results[name] * 1e6:.2f} µs', file=sys.stderr)
+    for name, module in startup_modules().items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        results[name] = min(import_time(module) for i in range(repeat))
+        print(f'{name}: {results[name] * 1e6:.2f} µs', file=sys.stderr)
+    return results
+
+
+def over_budget(results, budget=STARTUP_BUDGET):
+    """Return [(name, seconds)] of the startup benchmarks over <budget>.
+    """
+    return [(name, seconds) for name, seconds in results.items()
+            if name.startswith('startup.') and seconds > budget]
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return [(name, baseline, result)] of the benchmarks slower than
+    <baseline> by more than <threshold>, 0.25 being 25 %.
+    """
+    return [(name, baseline[name], seconds) for name, seconds in results.items()
+            if name in baseline and seconds > baseline[name] * (1 + threshold)]
+
+
+def main():
+    """Fetch args from the commandline and proceed.
+    """
+    parser = argparse.ArgumentParser(
+                        prog='bench_yze',
+                        description='time the dice hot paths and compare with a baseline',
+                        epilog='')
+
+    parser.add_argument('names', nargs='*',
+                        help="only run benchmarks starting with these names")
+    parser.add_argument('-o', '--output', default=None,
+                        help="write results to this JSON file")
+    parser.add_argument('-b', '--baseline', default=BASELINE)
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown counted as a regression, 0.25 (25 %%) by default")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store results as the new baseline")
+
+    args = parser.parse_args()
+    results = run(args.names, args.repeat)
+    slow = over_budget(results)
+    for name, seconds in slow:
+        print(f'{name} over budget: {seconds * 1e3:.1f} ms > {STARTUP_BUDGET * 1e3:.0f} ms',
+              file=sys.stderr)
+    document = {'python': platform.python_version(), 'machine': platform.machine(),
+                'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        return
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, nothing to compare.', file=sys.stderr)
+        if slow:
+            sys.exit(1)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for name, before, after in regressions:
+        print(f'{name} regressed: {before * 1e6:.2f} µs -> {after * 1e6:.2f} µs '
+              f'({(after / before - 1) * 100:+.0f} %)', file=sys.stderr)
+    if regressions or slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
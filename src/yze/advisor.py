@@ -0,0 +1,162 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Should a Mutant or Forbidden Lands roll be pushed? The value of a
+roll is the value of its successes minus the cost of the damage it
+does, weighted by Weights. Standing does no damage, pushing rerolls
+the free dice and every 1 on attribute and gear dice, locked or new,
+is damage.
+
+The damage of a push is linear in the dice, only the value of
+successes needs the distribution of the rerolled dice. That part is
+precomputed by PolicyTable for every (locked successes, rerolled
+dice, rerolled artefact die) state, so advice is a lookup.
+
+    >>> advise([2, 5, 3], [4, 5], [3, 2])
+    {'stand': 0.0, 'push': 0.333..., 'gain': 0.333..., 'recommendation': 'push'}
+    >>> advise([6, 1, 1], [4], [1], weights=Weights(target=2))['recommendation']
+    'stand'
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from yze.dice import ARTEFACT_SUCCESSES, DICE_SIZES, FBLDicePool
+
+# success is the value of one success, or of reaching target successes
+# when target is given, attr_damage and gear_damage the cost of one
+# damage
+Weights = namedtuple('Weights', ['success', 'attr_damage', 'gear_damage', 'target'],
+                     defaults=[1.0, 1.0, 1.0, None])
+DEFAULT_WEIGHTS = Weights()
+MAX_DICE = 30
+MAX_SUCCESSES = 40
+
+
+def success_value(weights, successes):
+    """Value of <successes> under <weights>.
+    """
+    if weights.target is None:
+        return weights.success * successes
+    return weights.success if successes >= weights.target else 0.0
+
+
+@lru_cache(maxsize=None)
+def reroll_successes(dice, artefact=None):
+    """Probabilities of 0, 1, 2... new successes when <dice> d6 and, if
+    given, an artefact die of size <artefact> are rerolled.
+    """
+    dist = [1.0]
+    if artefact is not None:
+        table = ARTEFACT_SUCCESSES[artefact]
+        dist = [0.0] * (max(table) + 1)
+        for face in range(1, artefact + 1):
+            dist[table[face]] += 1 / artefact
+    for die in range(dice):
+        dist = [a * 5 / 6 + b / 6 for a, b in zip(dist + [0.0], [0.0] + dist)]
+    return tuple(dist)
+
+
+def push_state(attribute, skill, gear, artefact=None):
+    """Reduce a roll to (locked successes, rerolled dice, rerolled
+    artefact die size or None, locked attribute 1s, rerolled attribute
+    dice, locked gear 1s, rerolled gear dice). <artefact> is (size,
+    face) of a Forbidden Lands artefact die.
+    """
+    successes = len([x for x in (*attribute, *skill, *gear) if x == 6])
+    rerolled_artefact = None
+    if artefact is not None:
+        size, face = artefact
+        if ARTEFACT_SUCCESSES[size][face]:
+            successes += ARTEFACT_SUCCESSES[size][face]
+        else:
+            rerolled_artefact = size
+    attr_ones = len([x for x in attribute if x == 1])
+    gear_ones = len([x for x in gear if x == 1])
+    attr_free = len(attribute) - attr_ones - len([x for x in attribute if x == 6])
+    gear_free = len(gear) - gear_ones - len([x for x in gear if x == 6])
+    skill_free = len([x for x in skill if x != 6])
+    return (successes, attr_free + skill_free + gear_free, rerolled_artefact,
+            attr_ones, attr_free, gear_ones, gear_free)
+
+
+class PolicyTable:
+    """Gain in success value of pushing, for every state of up to
+    <max_successes> locked successes and <max_dice> rerolled dice,
+    with or without a rerolled artefact die. States out of the table
+    are computed when asked.
+    """
+    def __init__(self, weights=DEFAULT_WEIGHTS, max_dice=MAX_DICE, max_successes=MAX_SUCCESSES):
+        self.weights = weights
+        self.gains = {}
+        for artefact in (None, *DICE_SIZES):
+            for dice in range(max_dice + 1):
+                for successes in range(max_successes + 1):
+                    self.gains[(successes, dice, artefact)] = self.compute_gain(successes, dice, artefact)
+
+    def compute_gain(self, successes, dice, artefact=None):
+        dist = reroll_successes(dice, artefact)
+        pushed = sum(p * success_value(self.weights, successes + k) for k, p in enumerate(dist))
+        return pushed - success_value(self.weights, successes)
+
+    def gain(self, successes, dice, artefact=None):
+        """Expected success value gained by rerolling <dice> d6 and the
+        <artefact> die with <successes> locked.
+        """
+        key = (successes, dice, artefact)
+        if key not in self.gains:
+            return self.compute_gain(*key)
+        return self.gains[key]
+
+    def advise(self, attribute, skill, gear, artefact=None):
+        """Expected values of standing and pushing a first roll of
+        attribute, skill and gear faces, and the recommendation. See
+        push_state for <artefact>.
+        """
+        successes, dice, rerolled_artefact, attr_ones, attr_free, gear_ones, gear_free = \
+            push_state(attribute, skill, gear, artefact)
+        stand = success_value(self.weights, successes)
+        damage = (self.weights.attr_damage * (attr_ones + attr_free / 6)
+                  + self.weights.gear_damage * (gear_ones + gear_free / 6))
+        gain = self.gain(successes, dice, rerolled_artefact) - damage
+        return {
+            'stand': stand,
+            'push': stand + gain,
+            'gain': gain,
+            'recommendation': 'push' if gain > 0 else 'stand',
+        }
+
+
+@lru_cache(maxsize=16)
+def policy_table(weights=DEFAULT_WEIGHTS):
+    """Shared PolicyTable of <weights>, built once.
+    """
+    return PolicyTable(weights)
+
+
+def advise(attribute, skill=(), gear=(), artefact=None, weights=DEFAULT_WEIGHTS):
+    """Advice on pushing a Mutant or Forbidden Lands roll, see
+    PolicyTable.advise.
+    """
+    return policy_table(weights).advise(attribute, skill, gear, artefact)
+
+
+def advise_pool(pool, weights=DEFAULT_WEIGHTS):
+    """Advice on pushing a thrown MutantDicePool or FBLDicePool.
+    """
+    result = pool.throw()
+    artefact = None
+    if isinstance(pool, FBLDicePool) and pool.artefact is not None:
+        artefact = (pool.artefact, result['artefact'][0])
+    return advise(result['attr'], result['skill'], result['gear'], artefact, weights)
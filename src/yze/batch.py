@@ -0,0 +1,172 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Vectorized dice engine. Every die of <n> pools is drawn at once in
+a (n, dice) array of faces, one row per roll and one column per die.
+This module needs NumPy, install yze with the numpy extra.
+"""
+
+import numpy as np
+
+from yze.dice import ALIEN_SPEC, MUTANT_SPEC
+
+
+def make_rng(rng=None):
+    """Return a numpy.random.Generator. <rng> may already be one, a
+    seed, or None for fresh OS entropy.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(rng)
+
+
+def throw_faces(n, dice, rng=None):
+    """Throw <dice> d6 <n> times. Returns a (n, dice) uint8 array.
+    """
+    return make_rng(rng).integers(1, 7, size=(n, dice), dtype=np.uint8)
+
+
+def spec_widths(spec, sizes, width):
+    """Number of columns of every group of a PoolSpec with <sizes>
+    dice when faces are <width> columns wide, the columns added by
+    pushes going to the added groups.
+    """
+    extra = width - sum(sizes)
+    added = len(spec.added)
+    widths = []
+    for group, size in zip(spec.groups, sizes):
+        if group.name in spec.added:
+            size += extra // added
+        widths.append(size)
+    return widths
+
+
+def spec_slices(spec, sizes, width):
+    """(DieGroup, slice of its columns) of every group.
+    """
+    start = 0
+    slices = []
+    for group, size in zip(spec.groups, spec_widths(spec, sizes, width)):
+        slices.append((group, slice(start, start + size)))
+        start += size
+    return slices
+
+
+def spec_faces(spec, sizes, n, width, rng=None):
+    """Throw <n> rows of <width> faces of a PoolSpec with <sizes> dice,
+    each column of the size of the dice of its group.
+    """
+    rng = make_rng(rng)
+    faces = throw_faces(n, width, rng)
+    for group, columns in spec_slices(spec, sizes, width):
+        if group.size != 6:
+            faces[:, columns] = rng.integers(1, group.size + 1, size=faces[:, columns].shape,
+                                             dtype=np.uint8)
+    return faces
+
+
+def spec_throw(spec, sizes, n, rng=None):
+    """Throw a pool of a PoolSpec with <sizes> dice <n> times. Returns a
+    (n, dice) uint8 array, groups one after the other.
+    """
+    return spec_faces(spec, sizes, n, sum(sizes), rng)
+
+
+def spec_keep_mask(spec, sizes, faces):
+    """Dice kept when pushing: the locked faces of every group.
+    """
+    keep = np.zeros(faces.shape, dtype=bool)
+    for group, columns in spec_slices(spec, sizes, faces.shape[1]):
+        for face in group.locked:
+            keep[:, columns] |= faces[:, columns] == face
+    return keep
+
+
+def spec_push(spec, sizes, faces, rng=None):
+    """Push every roll of <faces> at once. Returns a new array, the
+    kept dice are left untouched, all others are rerolled and the
+    added groups get a new die at their end.
+    """
+    rng = make_rng(rng)
+    keep = spec_keep_mask(spec, sizes, faces)
+    pushed = np.where(keep, faces, spec_faces(spec, sizes, faces.shape[0], faces.shape[1], rng))
+    if spec.added:
+        added = [(group, columns.stop) for group, columns in spec_slices(spec, sizes, faces.shape[1])
+                 if group.name in spec.added]
+        new = throw_faces(faces.shape[0], len(added), rng)
+        for i, (group, end) in enumerate(added):
+            if group.size != 6:
+                new[:, i] = rng.integers(1, group.size + 1, size=faces.shape[0], dtype=np.uint8)
+        pushed = np.insert(pushed, [end for group, end in added], new, axis=1)
+    return pushed
+
+
+def spec_counts(spec, sizes, faces):
+    """Count per roll successes and the botches of every group with
+    one. Returns a dict of (n,) arrays.
+    """
+    counts = {'successes': np.count_nonzero(faces == 6, axis=1)}
+    for group, columns in spec_slices(spec, sizes, faces.shape[1]):
+        if group.successes is not None:
+            # the 6s of the group were counted above as one success
+            group_faces = faces[:, columns]
+            counts['successes'] = counts['successes'] - np.count_nonzero(group_faces == 6, axis=1) \
+                + np.array(group.successes)[group_faces].sum(axis=1)
+        if group.botch is not None:
+            counts[group.botch] = np.count_nonzero(faces[:, columns] == 1, axis=1)
+    return counts
+
+
+def mutant_keep_mask(faces, attr, skill, gear):
+    """Dice kept when pushing a Mutant pool: 1s and 6s on attribute
+    and gear dice, 6s on skill dice.
+    """
+    return spec_keep_mask(MUTANT_SPEC, (attr, skill, gear), faces)
+
+
+def mutant_push(faces, attr, skill, gear, rng=None):
+    """Push every roll of <faces> at once. Returns a new array, the
+    kept dice are left untouched and all others are rerolled.
+    """
+    return spec_push(MUTANT_SPEC, (attr, skill, gear), faces, rng)
+
+
+def mutant_counts(faces, attr, skill, gear):
+    """Count per roll successes, attribute botches and gear botches.
+    Returns a dict of (n,) arrays.
+    """
+    return spec_counts(MUTANT_SPEC, (attr, skill, gear), faces)
+
+
+def tally(counts):
+    """Turn an array of per roll counts into a {count: occurrences}
+    dict, leaving out zero.
+    """
+    hist = np.bincount(counts)
+    return {i: int(hist[i]) for i in range(1, len(hist)) if hist[i]}
+
+
+def alien_levels(n, pool, stress, pushes, rng=None):
+    """Throw an Alien pool <n> times then push it <pushes> times, each
+    push adding a stress die. Returns the spec_counts of each level (the
+    throw, then each push): per roll 'successes' and 'stress_ones'.
+    """
+    rng = make_rng(rng)
+    sizes = (pool, stress)
+    faces = spec_throw(ALIEN_SPEC, sizes, n, rng)
+    levels = [spec_counts(ALIEN_SPEC, sizes, faces)]
+    for level in range(pushes):
+        faces = spec_push(ALIEN_SPEC, sizes, faces, rng)
+        levels.append(spec_counts(ALIEN_SPEC, sizes, faces))
+    return levels
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+from yze.dice import AlienDicePool
+
+LEVEL_NAMES = ['First roll', 'Pushed roll', 'Multipushed roll']
+
+
+def level_name(level):
+    """Name of a push level, 0 being the first roll.
+    """
+    if level < len(LEVEL_NAMES):
+        return LEVEL_NAMES[level]
+    return f'Pushed {level} times'
+
+
+def multiple_throws(throws=10000, pool=1, stress=0, pushes=2, rng=None):
+    """Throw an Alien pool <throws> times and push it <pushes> times.
+    Returns one results dict per level, the first roll then each
+    push. Panic is any stress die showing 1. Rolls are made all at
+    once with the NumPy batch engine when it is available.
+    """
+    try:
+        from yze import batch
+    except ImportError:
+        return multiple_throws_python(throws, pool, stress, pushes)
+    levels = []
+    for level in batch.alien_levels(int(throws), int(pool), int(stress), int(pushes), rng):
+        successes = batch.tally(level['successes'])
+        levels.append({
+            'atleast_one': sum(successes.values()),
+            'panic': sum(batch.tally(level['stress_ones']).values()),
+            'successes': successes,
+        })
+    return levels
+
+
+def multiple_throws_python(throws=10000, pool=1, stress=0, pushes=2):
+    """Same as multiple_throws, one AlienDicePool at a time. Used when
+    NumPy is not installed, it can push twice at most.
+    """
+    if pushes > 2:
+        raise ValueError("Install NumPy to push more than twice.")
+    levels = [{'atleast_one': 0, 'panic': 0, 'successes': {}} for level in range(pushes + 1)]
+    for i in range(int(throws)):
+        d = AlienDicePool(pool=int(pool), stress=int(stress))
+        res = [d.throw()]
+        if pushes >= 1:
+            res.append(d.push())
+        if pushes >= 2:
+            res.append(d.multipush())
+        for r, results in zip(res, levels):
+            successes = len([x for x in r['pool'] + r['stress'] if x == 6])
+            if successes > 0:
+                results['atleast_one'] += 1
+                results['successes'][successes] = results['successes'].get(successes, 0) + 1
+            if 1 in r['stress']:
+                results['panic'] += 1
+    return levels
+
+
+def print_levels(levels, throws):
+    """Pretty print the results of every level to terminal
+    """
+    for level, results in enumerate(levels):
+        print(f'{level_name(level)}:')
+        print(f"    at least one success: {results['atleast_one'] * 100 / throws} %")
+        print(f"    panic: {results['panic'] * 100 / throws} %")
+        for key in sorted(results['successes']):
+            print(f"    chances to get {key}: {results['successes'][key] * 100 / throws} %")
+
+
+def print_complete_list(throws, pushes=2, exact_odds=False, seed=None):
+    """Print odds of success and panic for pools of 1 to 10 dice and 0
+    to 5 stress dice, for every push level. alo s. is for at least
+    one success.
+    """
+    from yze import exact
+    if exact_odds:
+        throws = 1
+    header = "Pool\tStress"
+    for level in range(pushes + 1):
+        header = header + f"\t{level} p. alo s.\t{level} p. panic"
+    print(header)
+    rng = None
+    if seed is not None and not exact_odds:
+        from yze import batch
+        rng = batch.make_rng(seed)
+    for pool in range(1, 11):
+        for stress in range(0, 6):
+            if exact_odds:
+                levels = exact.alien_results(pool, stress, pushes)
+            else:
+                levels = multiple_throws(throws, pool, stress, pushes, rng)
+            line = f"{pool}\t{stress}"
+            for results in levels:
+                line = line + f"\t{results['atleast_one'] * 100 / throws}\t{results['panic'] * 100 / throws}"
+            print(line)
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
+    """
+    import argparse
+    from yze import exact
+    parser = argparse.ArgumentParser(
+                        prog='benchmark_alien',
+                        description='chances of success and panic of an Alien dice pool, pushed or not',
+                        epilog='')
+
+    parser.add_argument('-t', '--throws', default=100000)
+    parser.add_argument('-p', '--pool', default=1)
+    parser.add_argument('-s', '--stress', default=0)
+    parser.add_argument('-P', '--pushes', type=int, default=2,
+                        help="how many times the pool is pushed, 2 by default")
+    parser.add_argument('-c', '--complete', action='store_true')
+    parser.add_argument('-e', '--exact', action='store_true',
+                        help="compute exact odds instead of throwing dice")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed the dice for reproducible results")
+
+    args = parser.parse_args(argv)
+    throws = int(args.throws)
+
+    if args.complete:
+        print_complete_list(throws, args.pushes, exact_odds=args.exact, seed=args.seed)
+    else:
+        if args.exact:
+            throws = 1
+            levels = exact.alien_results(args.pool, args.stress, args.pushes)
+        else:
+            levels = multiple_throws(throws, args.pool, args.stress, args.pushes, rng=args.seed)
+        print_levels(levels, throws)
+
+
+if __name__ == "__main__":
+    main()
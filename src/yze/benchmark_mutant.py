@@ -14,21 +14,47 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
+# Only what every command needs is imported here, exact odds, the
+# cache, argparse and logging are imported when used so that starting
+# the command stays fast.
 from yze.dice import MutantDicePool
-import argparse
-import pprint
-import logging, sys, os
+import sys, os
 
-DEBUG=os.getenv('DEBUG')
-loglevel = logging.INFO
-if DEBUG:
-    loglevel = logging.DEBUG
-logging.basicConfig(stream=sys.stderr, level=loglevel)
 
-
-def multiple_throws(throws=10000, attribute=1, skill=0, gear=0):
+def multiple_throws(throws=10000, attribute=1, skill=0, gear=0, rng=None):
     """Throw dice <throws> times, store results in <results>, return
-    results.
+    results. Rolls are made all at once with the NumPy batch engine
+    when it is available. <rng> is a numpy.random.Generator or a seed.
+    """
+    try:
+        from yze import batch
+    except ImportError:
+        return multiple_throws_python(throws, attribute, skill, gear)
+    rng = batch.make_rng(rng)
+    d = MutantDicePool(attr=int(attribute), skill=int(skill), gear=int(gear))
+    faces = d.throw_many(int(throws), rng)
+    pushed = d.push_many(faces, rng)
+    first = d.count_many(faces)
+    after = d.count_many(pushed)
+    successes = batch.tally(first['successes'])
+    pushed_successes = batch.tally(after['successes'])
+    attribute_botched = batch.tally(after['attr_botches'])
+    gear_botched = batch.tally(after['gear_botches'])
+    return {
+        'atleast_one': sum(successes.values()),
+        'atleast_one_pushed': sum(pushed_successes.values()),
+        'atleast_one_attr_botch': sum(attribute_botched.values()),
+        'atleast_one_gear_botch': sum(gear_botched.values()),
+        'successes': successes,
+        'pushed_successes': pushed_successes,
+        'attribute_botched': attribute_botched,
+        'gear_botched': gear_botched,
+    }
+
+
+def multiple_throws_python(throws=10000, attribute=1, skill=0, gear=0):
+    """Same as multiple_throws, one MutantDicePool at a time. Used
+    when NumPy is not installed.
     """
     results = {
         'atleast_one': 0,
@@ -77,86 +103,311 @@ def multiple_throws(throws=10000, attribute=1, skill=0, gear=0):
     return results
 
 
-def complete_benchmark():
-    """In dev yet, will launch multiple multiple_throws so as to try
-    to have almost exhaustive benchmarks.
+COUNT_KEYS = ['atleast_one', 'atleast_one_pushed', 'atleast_one_attr_botch', 'atleast_one_gear_botch']
+LIST_KEYS = ['successes', 'pushed_successes', 'attribute_botched', 'gear_botched']
+
+
+def merge_results(total, results):
+    """Add the counts of <results> to <total>, both multiple_throws
+    results.
+    """
+    for key in COUNT_KEYS:
+        total[key] += results[key]
+    for key in LIST_KEYS:
+        for i, count in results[key].items():
+            total[key][i] = total[key].get(i, 0) + count
+    return total
+
+
+def margin(count, throws, z):
+    """Half width of the confidence interval of a probability, in
+    percent. Agresti-Coull interval, so that rare and never seen
+    results get a sensible width.
+    """
+    n = throws + z * z
+    p = (count + z * z / 2) / n
+    return 100 * z * (p * (1 - p) / n) ** 0.5
+
 
+def result_margins(results, throws, z):
+    """Same dict as <results> with the margin of every probability.
     """
-    pass
-def print_result(result_name, result, throws):
-    """Pretty print result to terminal
+    margins = {key: margin(results[key], throws, z) for key in COUNT_KEYS}
+    for key in LIST_KEYS:
+        margins[key] = {i: margin(count, throws, z) for i, count in results[key].items()}
+    return margins
+
+
+def adaptive_throws(attribute=1, skill=0, gear=0, precision=0.1, confidence=95,
+                    batch=10000, max_throws=10000000, rng=None):
+    """Throw dice by batches of <batch> until every probability
+    reported, and every count not thrown yet, is known within +/-
+    <precision> percent at <confidence> percent, or <max_throws> is
+    reached. Returns multiple_throws
+    results with two more keys: 'throws' made and 'margins' achieved.
     """
-    print (f'{result_name}: {result * 100 / throws} %')
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + confidence / 200)
+    try:
+        from yze import batch as batch_engine
+        rng = batch_engine.make_rng(rng)
+    except ImportError:
+        pass
+    dice = attribute + skill + gear
+    # every count a list may hold, even those not thrown yet
+    counts = dict(zip(LIST_KEYS, (dice, dice, attribute, gear)))
+    throws = 0
+    total = None
+    while True:
+        n = min(batch, max_throws - throws)
+        results = multiple_throws(n, attribute, skill, gear, rng)
+        total = results if total is None else merge_results(total, results)
+        throws += n
+        margins = result_margins(total, throws, z)
+        widest = max([margins[key] for key in COUNT_KEYS]
+                     + [margins[key].get(i, margin(0, throws, z))
+                        for key in LIST_KEYS for i in range(1, counts[key] + 1)])
+        if widest <= precision or throws >= max_throws:
+            break
+    total['throws'] = throws
+    total['margins'] = margins
+    return total
 
 
-def print_result_list(result_list_name, result_list, throws):
+def complete_configs(attributes=range(1, 6), skills=range(0, 6), gears=range(0, 3)):
+    """Every (attribute, skill, gear) pool of the complete benchmark, in
+    the order they are printed. Each axis is a range of values, from
+    1 to 5 attribute dice, 0 to 5 skill dice and 0 to 2 gear dice by
+    default.
+    """
+    configs = []
+    for attr in attributes:
+        for skill in skills:
+            for gear in gears:
+                configs.append((attr, skill, gear))
+    return configs
+
+
+def parse_range(text):
+    """Turn a command line value, a number or two numbers joined by a
+    dash like 0-5, into a range including both ends.
+    """
+    import argparse
+    try:
+        first, _, last = text.partition('-')
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text} is not a number or a range like 0-5")
+    if first < 0 or last < first:
+        raise argparse.ArgumentTypeError(f"{text} is not a range of positive numbers")
+    return range(first, last + 1)
+
+
+def config_seed(seed, config):
+    """Independent RNG seed of a pool configuration out of <seed>. A
+    pool gets the same stream alone or in the complete list, whatever
+    the number of jobs.
+    """
+    if seed is None:
+        return None
+    try:
+        from numpy.random import SeedSequence
+    except ImportError:
+        return None
+    return SeedSequence(seed, spawn_key=tuple(config))
+
+
+def config_results(job):
+    """Results of one (attribute, skill, gear, throws, exact_odds,
+    seed, precision, confidence) job. With a <precision>, <throws> is
+    the most to make. Module level so a worker process can run it.
+    """
+    attr, skill, gear, throws, exact_odds, seed, precision, confidence = job
+    if exact_odds:
+        from yze import exact
+        return exact.mutant_results(attr, skill, gear)
+    if precision:
+        return adaptive_throws(attr, skill, gear, precision, confidence, max_throws=throws,
+                               rng=config_seed(seed, (attr, skill, gear)))
+    return multiple_throws(throws, attr, skill, gear, rng=config_seed(seed, (attr, skill, gear)))
+
+
+def bounded_map(executor, func, jobs, window):
+    """Like executor.map, but with at most <window> jobs submitted and
+    not yet yielded, so that a consumer stopping early does not leave
+    the whole sweep queued in the workers.
+    """
+    from collections import deque
+    jobs = iter(jobs)
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(func, job))
+        if len(pending) >= window:
+            break
+    while pending:
+        result = pending.popleft().result()
+        for job in jobs:
+            pending.append(executor.submit(func, job))
+            break
+        yield result
+
+
+def complete_benchmark(throws, exact_odds=False, jobs=1, seed=None, cache=None,
+                       precision=None, confidence=95, skip=(), configs=None):
+    """Launch multiple multiple_throws so as to have almost exhaustive
+    benchmarks. Yields (attribute, skill, gear, throws, results) in
+    the order of complete_configs, throws being None for exact odds
+    and more than asked when a bigger run came from <cache>. With
+    <jobs> greater than 1 the pools are spread over as many worker
+    processes. With a <precision>, each pool is thrown by
+    adaptive_throws up to <throws> times and <cache> is not used.
+    <configs> are the pools to throw, complete_configs() by default,
+    the ones in <skip> are left out.
+    """
+    if exact_odds:
+        throws = None
+        seed = None
+    if precision and not exact_odds:
+        cache = None
+    if configs is None:
+        configs = complete_configs()
+    configs = [config for config in configs if config not in skip]
+    found = {}
+    if cache is not None:
+        for config in configs:
+            hit = cache.get('mutant', config, throws, seed)
+            if hit is not None:
+                found[config] = hit
+    todo = [(a, s, g, throws, exact_odds, seed, precision, confidence)
+            for (a, s, g) in configs if (a, s, g) not in found]
+    if jobs > 1 and len(todo) > 1 and not exact_odds:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        computed = bounded_map(executor, config_results, todo, 2 * jobs)
+    else:
+        executor = None
+        computed = map(config_results, todo)
+    try:
+        for config in configs:
+            if config in found:
+                row_throws, results = found[config]
+            else:
+                results = next(computed)
+                row_throws = results.get('throws', throws)
+                if cache is not None:
+                    cache.put('mutant', config, throws, results, seed)
+            yield (*config, row_throws, results)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def print_result(result_name, result, throws, margin=None):
+    """Pretty print result to terminal, with its confidence interval
+    <margin> if any.
+    """
+    if margin is None:
+        print (f'{result_name}: {result * 100 / throws} %')
+    else:
+        print (f'{result_name}: {result * 100 / throws} % ± {margin:.3f}')
+
+
+def print_result_list(result_list_name, result_list, throws, margins=None):
     """Pretty print the full result list
     """
     print(f'{result_list_name}:')
     for key in sorted(result_list):
-        print(f'    chances to get {key}: {result_list[key] * 100 / throws} %')
+        if margins is None:
+            print(f'    chances to get {key}: {result_list[key] * 100 / throws} %')
+        else:
+            print(f'    chances to get {key}: {result_list[key] * 100 / throws} % ± {margins[key]:.3f}')
 
 
-def percent_result(result, throws):
-    """Avoid repeating the same pattern all over
+def count_sizes(configs):
+    """Highest counts of (successes, pushed successes, attribute
+    botches, gear botches) over pool configurations.
     """
-    return str(result * 100 / throws)
+    return (max(a + s + g for a, s, g in configs), max(a + s + g for a, s, g in configs),
+            max(a for a, s, g in configs), max(g for a, s, g in configs))
+
 
-def print_complete_list(throws):
-    """Process and pretty print the complete result list, all results
-    are percentage results. s. is for successes, p. for pushed and
-    d. for damage. alo is for at least one. s. is for successes, p. for pushed and
+def complete_columns(sizes):
+    """Column names of the complete list, with a column per count up to
+    <sizes> (see count_sizes). s. is for successes, p. for pushed and
     d. for damage. alo is for at least one.
     """
-    header = "Attr\tSkill\tGear\talo s.\talo p."
-    header = header + "\talo attr d."
-    header = header + "\talo gear d."
-    for i in range(1, 11):
-        header = header + f"\t{i} s."
-    for i in range(1, 13):
-        header = header + f"\t{i} p. s."
-    for i in range(1, 7):
-        header = header + f"\t{i} attr. d."
-    for i in range(1, 4):
-        header = header + f"\t{i} gear d."
-    print(header)
-    attr = 1
-    skill = 0
-    gear = 0
-    while attr < 6:
-        while skill < 6:
-            while gear < 3:
-                results = multiple_throws(throws, attr, skill, gear)
-                line = f"{attr}\t{skill}\t{gear}\t{results['atleast_one'] * 100 / throws} \t{results['atleast_one_pushed'] * 100 / throws} "
-                line = line + f"\t{percent_result(results['atleast_one_attr_botch'], throws)}"
-                line = line + f"\t{percent_result(results['atleast_one_gear_botch'], throws)}"
-                for i in range(1, 11):
-                    line = line + "\t"
-                    if i in results['successes']:
-                        line = line + percent_result(results['successes'][i], throws)
-                for i in range(1, 13):
-                    line = line + "\t"
-                    if i in results['pushed_successes']:
-                        line = line + percent_result(results['pushed_successes'][i], throws)
-                for i in range(1, 7):
-                    line = line + "\t"
-                    if i in results['attribute_botched']:
-                        line = line + percent_result(results['attribute_botched'][i], throws)
-                for i in range(1, 4):
-                    line = line + "\t"
-                    if i in results['gear_botched']:
-                        line = line + percent_result(results['gear_botched'][i], throws)
-                print(line)
-                gear += 1
-            skill += 1
-            gear = 0
-        attr += 1
-        skill = 0
-
-
-def main():
-    """Fetch args from the commandline and proceed.
+    columns = ['Attr', 'Skill', 'Gear', 'alo s.', 'alo p.', 'alo attr d.', 'alo gear d.']
+    for name, last in zip(('s.', 'p. s.', 'attr. d.', 'gear d.'), sizes):
+        columns += [f'{i} {name}' for i in range(1, last + 1)]
+    return columns
+
+
+def complete_row(attr, skill, gear, throws, results, sizes):
+    """Return (row, margins) of one pool of the complete list: values
+    in percent in the order of complete_columns, None where the count
+    never came out. margins is None unless results have some.
+    """
+    throws = throws or 1
+    found = results.get('margins')
+    row = [attr, skill, gear]
+    margins = [None, None, None]
+    for key in COUNT_KEYS:
+        row.append(results[key] * 100 / throws)
+        margins.append(found and found[key])
+    for key, last in zip(LIST_KEYS, sizes):
+        for i in range(1, last + 1):
+            if i in results[key]:
+                row.append(results[key][i] * 100 / throws)
+                margins.append(found and found[key][i])
+            else:
+                row.append(None)
+                margins.append(None)
+    return row, (margins if found else None)
+
+
+def print_complete_list(throws, exact_odds=False, jobs=1, seed=None, cache=None,
+                        precision=None, confidence=95, output=None, fmt='tsv', resume=False,
+                        configs=None):
+    """Process and write the complete result list, all results are
+    percentage results. With <exact_odds> the results are computed
+    instead of simulated. The other arguments are passed to
+    complete_benchmark, with a <precision> each value comes with its
+    confidence interval. Rows go to stdout or to the <output> file
+    as soon as they are known, in <fmt>. With <resume>, pools already
+    in <output> are not thrown again. <configs> are the pools of the
+    list, complete_configs() by default.
+    """
+    from yze.output import open_output
+    if configs is None:
+        configs = complete_configs()
+    sizes = count_sizes(configs)
+    writer, done = open_output(output, fmt, complete_columns(sizes), ['Attr', 'Skill', 'Gear'], resume)
+    rows = complete_benchmark(throws, exact_odds, jobs, seed, cache, precision, confidence,
+                              skip=done, configs=configs)
+    try:
+        for attr, skill, gear, throws, results in rows:
+            writer.write(*complete_row(attr, skill, gear, throws, results, sizes))
+    except BrokenPipeError:
+        # the reader of a pipe went away, do not complain at exit either
+        sys.stdout = open(os.devnull, 'w')
+    finally:
+        if output is not None:
+            writer.stream.close()
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
     """
+    import argparse
+    import logging
+    from yze import cache
+    from yze.output import FORMATS, ResumeError
+    loglevel = logging.INFO
+    if os.getenv('DEBUG'):
+        loglevel = logging.DEBUG
+    logging.basicConfig(stream=sys.stderr, level=loglevel)
+
     parser = argparse.ArgumentParser(
                         prog='benchmark_mutant',
                         description='make a lot of YZE rolls so as to have an idea of chances of success',
@@ -167,22 +418,74 @@ def main():
     parser.add_argument('-s', '--skill', default=0)
     parser.add_argument('-g', '--gear', default=0)
     parser.add_argument('-c', '--complete', action='store_true')
+    parser.add_argument('-e', '--exact', action='store_true',
+                        help="compute exact odds instead of throwing dice")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of worker processes for the complete list")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed the dice for reproducible results")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not read or store results in the user cache")
+    parser.add_argument('-p', '--precision', type=float, default=None,
+                        help="throw until every odd is known within this many percent, "
+                        "--throws being then the most to make")
+    parser.add_argument('--confidence', type=float, default=95,
+                        help="confidence level of --precision, in percent (95 by default)")
+    parser.add_argument('--attributes', type=parse_range, default=range(1, 6),
+                        help="attribute dice of the complete list, like 1-5 (the default)")
+    parser.add_argument('--skills', type=parse_range, default=range(0, 6),
+                        help="skill dice of the complete list, like 0-5 (the default)")
+    parser.add_argument('--gears', type=parse_range, default=range(0, 3),
+                        help="gear dice of the complete list, like 0-2 (the default)")
+    parser.add_argument('-o', '--output', default=None,
+                        help="write the complete list to this file instead of stdout")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='tsv',
+                        help="format of the complete list, tsv by default")
+    parser.add_argument('--resume', action='store_true',
+                        help="keep the pools already in --output and only throw the others")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.resume and args.output is None:
+        parser.error("--resume needs --output")
     throws = int(args.throws)
+    result_cache = cache.open_cache(not args.no_cache)
 
     if args.complete:
-        print_complete_list(throws)
+        try:
+            print_complete_list(throws, exact_odds=args.exact, jobs=args.jobs, seed=args.seed,
+                                cache=result_cache, precision=args.precision, confidence=args.confidence,
+                                output=args.output, fmt=args.format, resume=args.resume,
+                                configs=complete_configs(args.attributes, args.skills, args.gears))
+        except ResumeError as e:
+            parser.error(str(e))
     else:
-        results = multiple_throws(throws, args.attribute, args.skill, args.gear)
-        print_result('at least one success', results['atleast_one'], throws)
-        print_result('at least on pushed succes', results['atleast_one_pushed'], throws)
-        print_result('at least one damage to attribute', results['atleast_one_attr_botch'], throws)
-        print_result('at least one damage to gear', results['atleast_one_gear_botch'], throws)
-        print_result_list('Successes on first roll', results['successes'], throws)
-        print_result_list('Successes on pushed roll', results['pushed_successes'], throws)
-        print_result_list('Attribute damage', results['attribute_botched'], throws)
-        print_result_list('Gear damage', results['gear_botched'], throws)
+        config = (int(args.attribute), int(args.skill), int(args.gear))
+        if args.exact:
+            job = (*config, None, True, None, None, None)
+        else:
+            job = (*config, throws, False, args.seed, args.precision, args.confidence)
+        if args.precision and not args.exact:
+            results = config_results(job)
+            throws = results['throws']
+            print(f'Thrown {throws} times for ± {args.precision} % at {args.confidence} %')
+        else:
+            throws, results = cache.lookup(result_cache, 'mutant', config, job[3], job[5],
+                                           lambda: config_results(job))
+            throws = throws or 1
+        margins = results.get('margins', {})
+        print_result('at least one success', results['atleast_one'], throws, margins.get('atleast_one'))
+        print_result('at least on pushed succes', results['atleast_one_pushed'], throws,
+                     margins.get('atleast_one_pushed'))
+        print_result('at least one damage to attribute', results['atleast_one_attr_botch'], throws,
+                     margins.get('atleast_one_attr_botch'))
+        print_result('at least one damage to gear', results['atleast_one_gear_botch'], throws,
+                     margins.get('atleast_one_gear_botch'))
+        print_result_list('Successes on first roll', results['successes'], throws, margins.get('successes'))
+        print_result_list('Successes on pushed roll', results['pushed_successes'], throws,
+                          margins.get('pushed_successes'))
+        print_result_list('Attribute damage', results['attribute_botched'], throws,
+                          margins.get('attribute_botched'))
+        print_result_list('Gear damage', results['gear_botched'], throws, margins.get('gear_botched'))
         logging.debug(results)
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+from yze.dice import STEP_DICE
+
+STEP_VALUES = tuple(STEP_DICE)
+ADVANTAGES = [(None, ''), (True, 'adv. '), (False, 'disadv. ')]
+
+
+def print_odds(name, odds):
+    """Pretty print the odds of one roll to terminal
+    """
+    print(f'{name}:')
+    print(f"    at least one success: {odds['atleast_one'] * 100} %")
+    for key in sorted(odds['successes']):
+        print(f"    chances to get {key}: {odds['successes'][key] * 100} %")
+    if 'ammo_hits' in odds:
+        for key in sorted(odds['ammo_hits']):
+            print(f"    chances to get {key} ammo hits: {odds['ammo_hits'][key] * 100} %")
+        print(f"    jam (an ammo die showing 1): {odds['jam'] * 100} %")
+
+
+def print_complete_list(game):
+    """Print the odds of at least one success of every attribute and
+    skill pair. alo s. is for at least one success, p. for pushed and
+    p. 1 for pushed even with one success.
+    """
+    from yze import exact
+    if game == 't2k':
+        print("Attr\tSkill\talo s.\talo p. s.")
+        for attr in exact.STEP_VALUES:
+            for skill in exact.STEP_VALUES + (None,):
+                first = exact.step_odds(game, attr, skill)
+                pushed = exact.step_odds(game, attr, skill, push='push')
+                print(f"{attr}\t{skill or '-'}\t{first['atleast_one'] * 100}\t{pushed['atleast_one'] * 100}")
+        return
+    header = "Attr\tSkill"
+    for advantage, name in ADVANTAGES:
+        header = header + f"\t{name}alo s.\t{name}alo p. s.\t{name}alo p. 1 s."
+    print(header)
+    for attr in exact.STEP_VALUES:
+        for skill in exact.STEP_VALUES:
+            line = f"{attr}\t{skill}"
+            for advantage, name in ADVANTAGES:
+                for push in (None, 'push', 'even_one_success'):
+                    odds = exact.step_odds(game, attr, skill, advantage, push)
+                    line = line + f"\t{odds['atleast_one'] * 100}"
+            print(line)
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
+    """
+    import argparse
+    from yze import exact
+    parser = argparse.ArgumentParser(
+                        prog='benchmark_step',
+                        description='exact odds of Twilight 2000 and Blade Runner step dice pools',
+                        epilog='Attribute and skill values go from A (d12) to D (d6).')
+
+    parser.add_argument('-g', '--game', choices=['t2k', 'blade_runner'], default='blade_runner')
+    parser.add_argument('-a', '--attribute', choices=STEP_VALUES, default='D')
+    parser.add_argument('-s', '--skill', choices=STEP_VALUES, default=None,
+                        help="D by default for Blade Runner, none for Twilight 2000")
+    parser.add_argument('--ammo', type=int, default=0,
+                        help="Twilight 2000 ammo dice")
+    advantage = parser.add_mutually_exclusive_group()
+    advantage.add_argument('--advantage', dest='advantage', action='store_const', const=True,
+                           help="Blade Runner advantage")
+    advantage.add_argument('--disadvantage', dest='advantage', action='store_const', const=False,
+                           help="Blade Runner disadvantage")
+    parser.add_argument('--even-one-success', action='store_true',
+                        help="Blade Runner: also push dice with one success")
+    parser.add_argument('-c', '--complete', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    if args.complete:
+        print_complete_list(args.game)
+        return
+    if args.game == 't2k':
+        option = args.ammo
+        skill = args.skill
+        push = 'push'
+    else:
+        option = args.advantage
+        skill = args.skill or 'D'
+        push = 'even_one_success' if args.even_one_success else 'push'
+    print_odds('First roll', exact.step_odds(args.game, args.attribute, skill, option))
+    print_odds('Pushed roll', exact.step_odds(args.game, args.attribute, skill, option, push))
+
+
+if __name__ == "__main__":
+    main()
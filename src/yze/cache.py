@@ -0,0 +1,176 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Persistent cache of benchmark results in a SQLite database of the
+user cache directory. Results are keyed by game, pool configuration,
+number of throws (0 for exact odds), RNG seed and library version,
+and stored as compressed JSON.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_dir():
+    """Directory of the cache: $YZE_CACHE_DIR, or yze in
+    $XDG_CACHE_HOME, or ~/.cache/yze.
+    """
+    if os.getenv('YZE_CACHE_DIR'):
+        return os.getenv('YZE_CACHE_DIR')
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'yze')
+
+
+def library_version():
+    """Installed version of yze, results of another version are not
+    reused.
+    """
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return version('yze')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def int_keys(d):
+    """JSON object hook giving back the int keys of result dicts.
+    """
+    return {int(k) if k.isdigit() else k: v for k, v in d.items()}
+
+
+def encode(results):
+    """Compact binary form of results.
+    """
+    return zlib.compress(json.dumps(results, separators=(',', ':')).encode())
+
+
+def decode(data):
+    """Results back from their binary form.
+    """
+    return json.loads(zlib.decompress(data), object_hook=int_keys)
+
+
+class ResultCache:
+    """Benchmark results stored on disk. When the cache grows over
+    <max_bytes>, the least recently used results are evicted.
+    """
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            os.makedirs(cache_dir(), exist_ok=True)
+            path = os.path.join(cache_dir(), 'results.sqlite')
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = library_version()
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+            game TEXT, config TEXT, throws INTEGER, seed TEXT, version TEXT,
+            data BLOB, size INTEGER, accessed REAL,
+            PRIMARY KEY (game, config, throws, seed, version))""")
+        self.db.commit()
+
+    def key(self, game, config, seed):
+        """Database columns for a game, pool configuration and seed.
+        """
+        return (game, json.dumps(list(config)), '' if seed is None else str(seed), self.version)
+
+    def get(self, game, config, throws=None, seed=None):
+        """Return (throws, results) or None. <throws> None is for exact
+        odds. Unseeded runs of more throws are reused for fewer ones, a
+        seeded run only answers the same throws.
+        """
+        game, config, seed, version = self.key(game, config, seed)
+        throws = throws or 0
+        if throws and not seed:
+            row = self.db.execute("""SELECT throws, data FROM results
+                WHERE game = ? AND config = ? AND seed = ? AND version = ? AND throws >= ?
+                ORDER BY throws LIMIT 1""", (game, config, seed, version, throws)).fetchone()
+        else:
+            row = self.db.execute("""SELECT throws, data FROM results
+                WHERE game = ? AND config = ? AND seed = ? AND version = ? AND throws = ?""",
+                                  (game, config, seed, version, throws)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("""UPDATE results SET accessed = ?
+            WHERE game = ? AND config = ? AND seed = ? AND version = ? AND throws = ?""",
+                        (time.time(), game, config, seed, version, row[0]))
+        self.db.commit()
+        return (row[0] or None, decode(row[1]))
+
+    def put(self, game, config, throws, results, seed=None):
+        """Store results, <throws> None being exact odds, then evict
+        what does not fit any more.
+        """
+        game, config, seed, version = self.key(game, config, seed)
+        data = encode(results)
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (game, config, throws or 0, seed, version, data, len(data), time.time()))
+        self.evict()
+        self.db.commit()
+
+    def size(self):
+        """Bytes of results stored.
+        """
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def evict(self):
+        """Remove the least recently used results until the cache fits
+        in max_bytes.
+        """
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        rows = self.db.execute("SELECT rowid, size FROM results ORDER BY accessed").fetchall()
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            self.db.execute("DELETE FROM results WHERE rowid = ?", (rowid,))
+            excess -= size
+
+    def clear(self):
+        """Remove every result.
+        """
+        self.db.execute("DELETE FROM results")
+        self.db.commit()
+
+
+def open_cache(enabled=True):
+    """Return the default ResultCache, or None if <enabled> is False or
+    the cache directory cannot be used.
+    """
+    if not enabled:
+        return None
+    try:
+        return ResultCache()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def lookup(cache, game, config, throws, seed, compute):
+    """Return (throws, results) from <cache>, or run compute() and store
+    its results. <cache> may be None to always compute, <throws> None
+    is for exact odds.
+    """
+    if cache is None:
+        return (throws, compute())
+    hit = cache.get(game, config, throws, seed)
+    if hit is not None:
+        return hit
+    results = compute()
+    cache.put(game, config, throws, results, seed)
+    return (throws, results)
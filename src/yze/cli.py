@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""One yze command for every tool:
+
+    yze mutant -a 3 -s 2 -e
+    yze push -a 253 -s 45 -g 32 -e
+
+With --stdin, each line read is a command without the leading yze.
+The answer is written then followed by the separator line, so that a
+single process answers many queries without starting again, and
+exact odds computed once are kept for the next queries.
+"""
+
+import importlib
+import sys
+
+COMMANDS = {
+    'mutant': ('yze.benchmark_mutant', 'odds of a Mutant: Year Zero pool'),
+    'push': ('yze.mutant_odds_of_pushing', 'odds of pushing a Mutant roll'),
+    'alien': ('yze.benchmark_alien', 'odds of success and panic of an Alien pool'),
+    'step': ('yze.benchmark_step', 'exact odds of Twilight 2000 and Blade Runner pools'),
+    'server': ('yze.server', 'serve dice pools over HTTP'),
+}
+DEFAULT_SEPARATOR = '--'
+
+
+def usage():
+    """Help text listing the commands.
+    """
+    lines = ['usage: yze [--stdin [--separator TEXT]] COMMAND [ARGS]', '', 'commands:']
+    for name, (module, description) in COMMANDS.items():
+        lines.append(f'  {name:8} {description}')
+    lines.append('')
+    lines.append('yze COMMAND -h tells more about a command.')
+    return '\n'.join(lines)
+
+
+def run(argv):
+    """Run the command of <argv>, a list of words. Returns its exit
+    status instead of leaving.
+    """
+    if not argv or argv[0] not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[argv[0]][0])
+    try:
+        module.main(argv[1:])
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+def serve_stdin(stream=None, separator=DEFAULT_SEPARATOR):
+    """Run every command line read from <stream>, stdin by default,
+    writing <separator> on its own line after each answer. Empty lines
+    and lines starting with # are skipped.
+    """
+    import shlex
+    stream = sys.stdin if stream is None else stream
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            print(f'yze: {e}', file=sys.stderr)
+            argv = None
+        if argv and argv[0] == 'server':
+            print('yze: the server cannot be run from --stdin', file=sys.stderr)
+        elif argv is not None:
+            try:
+                run(argv)
+            except Exception as e:
+                print(f'yze: {type(e).__name__}: {e}', file=sys.stderr)
+        print(separator)
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == '--stdin':
+        separator = DEFAULT_SEPARATOR
+        if argv[1:2] == ['--separator'] and len(argv) > 2:
+            separator = argv[2]
+        serve_stdin(separator=separator)
+        return
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return
+    sys.exit(run(argv))
+
+
+if __name__ == "__main__":
+    main()
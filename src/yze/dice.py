@@ -12,27 +12,200 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
-from random import randrange
+from collections import namedtuple
+from collections.abc import Mapping
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+import os
+import random
+
+
+class RandomSource:
+    """Die faces drawn from a random.Random object, or from the random
+    module itself when none is given.
+    """
+    def __init__(self, rng=None):
+        self.rng = rng
+        self.randrange = (random if rng is None else rng).randrange
+
+    def face(self, size):
+        """Return a face between 1 and <size>.
+        """
+        return self.randrange(1, size + 1)
+
+
+class NumpySource:
+    """Die faces drawn from a numpy.random.Generator.
+    """
+    def __init__(self, generator):
+        self.generator = generator
+
+    def face(self, size):
+        """Return a face between 1 and <size>.
+        """
+        return int(self.generator.integers(1, size + 1))
+
+
+def random_bytes(rng, n):
+    """Return <n> random bytes from a random.Random object, or from
+    os.urandom when <rng> is None.
+    """
+    if rng is None:
+        return os.urandom(n)
+    return rng.randbytes(n)
+
+
+class FaceStream:
+    """Stream of faces of one die size. A whole block of random bytes
+    is turned into faces at once: bytes that would bias the result
+    are deleted and the others mapped to a face, both in a single
+    bytes.translate call. The bytes come from a random.Random object
+    if one is given, os.urandom otherwise.
+    """
+    def __init__(self, size=6, rng=None, block_size=4096):
+        limit = 256 - 256 % size
+        self.size = size
+        self.rng = rng
+        self.block_size = block_size
+        self.table = bytes(b % size + 1 if b < limit else 0 for b in range(256))
+        self.rejected = bytes(range(limit, 256))
+        self.buffer = b''
+        self.position = 0
+
+    def refill(self):
+        """Turn a new block of random bytes into faces.
+        """
+        self.buffer = random_bytes(self.rng, self.block_size).translate(self.table, self.rejected)
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.position >= len(self.buffer):
+            self.refill()
+        f = self.buffer[self.position]
+        self.position += 1
+        return f
+
+    def face(self, size=None):
+        """Return a face between 1 and the size of the stream. Lets a
+        FaceStream be used as the RNG of a die of the same size.
+        """
+        if size is not None and size != self.size:
+            raise ValueError(f"This stream throws d{self.size}, not d{size}.")
+        return next(self)
+
+    def faces(self, n):
+        """Return a list of <n> faces.
+        """
+        res = []
+        while len(res) < n:
+            if self.position >= len(self.buffer):
+                self.refill()
+            end = self.position + n - len(res)
+            res.extend(self.buffer[self.position:end])
+            self.position = min(end, len(self.buffer))
+        return res
+
+
+class BufferedSource:
+    """Die faces of any size drawn from buffers filled in advance, one
+    FaceStream per die size sharing the same <rng>.
+    """
+    def __init__(self, rng=None, block_size=4096):
+        self.rng = rng
+        self.block_size = block_size
+        self.streams = {}
+
+    def face(self, size):
+        """Return a face between 1 and <size>.
+        """
+        stream = self.streams.get(size)
+        if stream is None:
+            stream = self.streams[size] = FaceStream(size, self.rng, self.block_size)
+        return next(stream)
+
+
+DEFAULT_SOURCE = RandomSource()
+# Sources whose d6 are drawn by calling their bound randrange right
+# away, saving a method call per die. stats.enable empties it so that
+# every die goes through face and is counted.
+DIRECT_SOURCES = (RandomSource,)
+
+
+def as_source(rng=None):
+    """Return a die face source for <rng>: None for the random module,
+    a random.Random, a numpy.random.Generator or any object with a
+    face(size) method.
+    """
+    if rng is None:
+        return DEFAULT_SOURCE
+    if hasattr(rng, 'face'):
+        return rng
+    if isinstance(rng, random.Random):
+        return RandomSource(rng)
+    if hasattr(rng, 'integers'):
+        return NumpySource(rng)
+    raise TypeError(f"Cannot draw dice from {rng!r}")
+
+
+DICE_SIZES = (6, 8, 10, 12)
+
+
+def successes_table(size, successes):
+    """Tuple of the successes of every face of a die of <size>, index 0
+    is unused. <successes> gives the successes of a face.
+    """
+    return tuple(successes(face) for face in range(size + 1))
+
+
+def artefact_successes(face):
+    """Artefact dice succeed on 6+, one more success every two faces,
+    4 on 12.
+    """
+    if face < 6:
+        return 0
+    return min((face - 4) // 2, 4)
+
+
+def step_successes(face):
+    """Step dice succeed once on 6 to 9, twice on 10+.
+    """
+    if face < 6:
+        return 0
+    return 1 if face < 10 else 2
+
+
+ARTEFACT_SUCCESSES = MappingProxyType({size: successes_table(size, artefact_successes) for size in DICE_SIZES})
+STEP_SUCCESSES = MappingProxyType({size: successes_table(size, step_successes) for size in DICE_SIZES})
+STEP_DICE = MappingProxyType({"A": 12, "B": 10, "C": 8, "D": 6})
+
+
+def check_size(size):
+    """Raise a ValueError unless <size> is a YZE die size.
+    """
+    if size not in DICE_SIZES:
+        raise ValueError(f"Dice size should be one of 6, 8, 10, 12. {size} was provided.")
 
 
 class SimpleDie:
     """Basic class for YZE dice
     """
-    def __init__(self, size=6):
+    def __init__(self, size=6, rng=None):
         """Check size of the dice, 6 by default or 8, 10, 12. Return a dice
-        object with a size attribute.
+        object with a size attribute. <rng> is given to as_source.
         """
-        dice_sizes = [6, 8, 10, 12]
-        d = [x for x in dice_sizes if x == size]
-        if len(d) != 1:
-            raise ValueError(f"Dice size should be one of 6, 8, 10, 12. {size} was provided.")
+        check_size(size)
         self.size = size
+        self.rng = as_source(rng)
 
     def throw(self):
         """Generate a pseudo-random number in the range of the SimpleDie
         Object. It returns an int.
         """
-        return randrange(1, self.size + 1)
+        return self.rng.face(self.size)
 
 
 class ArtefactDie(SimpleDie):
@@ -43,17 +216,8 @@ class ArtefactDie(SimpleDie):
         result. Returns a tuple with the results and the successes
         obtained. The success rate is different from Step dice.
         """
-        res = randrange(1, self.size + 1)
-        successes = 0
-        if 6 <= res <= 7:
-            successes = 1
-        elif 8 <= res <= 9:
-            successes = 2
-        elif 10 <= res <= 11:
-            successes = 3
-        elif res == 12:
-            successes = 4
-        return (res, successes)
+        res = self.rng.face(self.size)
+        return (res, ARTEFACT_SUCCESSES[self.size][res])
 
 
 class StepDie(SimpleDie):
@@ -65,19 +229,14 @@ class StepDie(SimpleDie):
         result. Returns a tuple with the results and the successes
         obtained. The success rate is different from ArtefactDie
         """
-        res = randrange(1, self.size + 1)
-        successes = 0
-        if 6 <= res <= 9:
-            successes = 1
-        elif 10 <= res <= 12:
-            successes = 2
-        return (res, successes)
+        res = self.rng.face(self.size)
+        return (res, STEP_SUCCESSES[self.size][res])
 
 
 class HitLocationDie():
     """Twilight 2000 use a special die to determine the hit location.
     """
-    def __init__(self):
+    def __init__(self, rng=None):
         """d6  Hit Location
         1   Legs
         2-4 Torso
@@ -86,79 +245,314 @@ class HitLocationDie():
         """
         self.hit_location = ["Leg", "Torso", "Torso", "Torso", "Arm", "Head"]
         self.die_size = 6
+        self.rng = as_source(rng)
 
     def throw(self):
         """Roll for hit location
         """
-        return self.hit_location[randrange(self.die_size)]
+        return self.hit_location[self.rng.face(self.die_size) - 1]
 
 
-class MutantDicePool:
-    """Emulate the dice pool found in Mutant: Year Zero. The
-    MutantDicePool object can only make one throw and then one
-    push. To make another throw, you’ll need to create a new object.
+@lru_cache(maxsize=None)
+def group_offsets(*lengths):
+    """Offsets of groups of <lengths> faces stored one after the
+    other. Cached, so pools of the same size share the same tuple.
+    """
+    offsets = [0]
+    for length in lengths:
+        offsets.append(offsets[-1] + length)
+    return tuple(offsets)
+
+
+class DiceResult(Mapping):
+    """Read only, dict like result of a dice pool. The faces of every
+    group are stored one after the other in a single bytes object,
+    <offsets> telling where each group starts and ends. Groups are
+    read back as lists, so d.result['attr'] works as it always
+    did. <extra> holds the (key, value) pairs that are not lists of
+    faces, like the artefact die.
     """
-    def __init__(self, attr=1, skill=0, gear=0):
-        """Build the object. Make two dicts of lists to store results. thrown
-        and push are state attributes.
+    __slots__ = ('groups', 'faces', 'offsets', 'extra')
+
+    def __init__(self, groups=(), faces=b'', offsets=(0,), extra=()):
+        self.groups = groups
+        self.faces = faces
+        self.offsets = offsets
+        self.extra = extra
+
+    @classmethod
+    def from_groups(cls, groups, lists, extra=()):
+        """Build a result out of the group names and one list of faces
+        per group.
         """
-        self.attr = attr
-        self.skill = skill
-        self.gear = gear
-        self.thrown = False
-        self.pushed = False
-        self.result = {'attr': [], 'skill': [], 'gear': []}
-        self.pushed_res = {'attr': [], 'skill': [], 'gear': []}
+        faces = bytes([f for faces_list in lists for f in faces_list])
+        return cls(groups, faces, group_offsets(*map(len, lists)), extra)
+
+    def group_faces(self, i):
+        """bytes of the faces of the <i>th group.
+        """
+        return self.faces[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, key):
+        if key in self.groups:
+            i = self.groups.index(key)
+            return list(self.faces[self.offsets[i]:self.offsets[i + 1]])
+        for k, value in self.extra:
+            if k == key:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.groups
+        for k, value in self.extra:
+            yield k
+
+    def __len__(self):
+        return len(self.groups) + len(self.extra)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+EMPTY_RESULT = DiceResult()
+
+
+def throw_d6(source, n):
+    """Throw <n> d6 from <source>, returns their faces as bytes.
+    """
+    if type(source) in DIRECT_SOURCES:
+        randrange = source.randrange
+        return bytes([randrange(1, 7) for i in range(n)])
+    face = source.face
+    return bytes([face(6) for i in range(n)])
+
+
+def reroll(source, faces, locks):
+    """Push d6 <faces>, bytes or a list: keep each face found in its
+    tuple of <locks> and draw the others again from <source>. Returns
+    bytes.
+    """
+    if type(source) in DIRECT_SOURCES:
+        randrange = source.randrange
+        return bytes([f if f in locked else randrange(1, 7) for f, locked in zip(faces, locks)])
+    face = source.face
+    return bytes([f if f in locked else face(6) for f, locked in zip(faces, locks)])
+
+
+# A die group of a pool: <name> is both the pool attribute holding its
+# number of dice and the key of its faces in results, <locked> the
+# faces kept when pushing, <botch> the name of the count of its 1s, or
+# None when they do not count. Its dice have <size> faces and get the
+# successes of their face in the <successes> table, or one success on
+# a 6 when it is None.
+DieGroup = namedtuple('DieGroup', ['name', 'locked', 'botch', 'size', 'successes'],
+                      defaults=[(6,), None, 6, None])
+# The rules of a pool: its DieGroups, and the names of the groups
+# getting a new die on each push.
+PoolSpec = namedtuple('PoolSpec', ['groups', 'added'], defaults=[()])
+
+MUTANT_SPEC = PoolSpec((DieGroup('attr', (1, 6), 'attr_botches'), DieGroup('skill'),
+                        DieGroup('gear', (1, 6), 'gear_botches')))
+FBL_SPEC = MUTANT_SPEC
+ALIEN_SPEC = PoolSpec((DieGroup('pool'), DieGroup('stress', (6,), 'stress_ones')), added=('stress',))
+
+
+@lru_cache(maxsize=None)
+def fbl_spec(artefact=None):
+    """PoolSpec of a Forbidden Lands pool with an artefact die of size
+    <artefact>, a last group of one die locked on its successes.
+    """
+    if artefact is None:
+        return FBL_SPEC
+    table = ARTEFACT_SUCCESSES[artefact]
+    locked = tuple(face for face in range(1, artefact + 1) if table[face])
+    return PoolSpec(FBL_SPEC.groups + (DieGroup('artefact', locked, None, artefact, table),))
+
+
+def spec_groups(spec):
+    """Names of the groups of <spec>, the keys of its results.
+    """
+    return tuple(group.name for group in spec.groups)
+
+
+class SpecPool:
+    """Throw and push of a pool of d6 groups described by the PoolSpec
+    <spec> of the class. Subclasses hold the state attributes (rng,
+    thrown, pushed, result, pushed_res) and one attribute per group
+    with its number of dice. throw_extra and push_extra give the
+    results that are not d6 groups, like the artefact die, which
+    pool_spec adds for the batch and exact engines.
+    """
+    __slots__ = ()
+    spec = None
+
+    def __init_subclass__(cls, **kwargs):
+        """Turn the spec of the class into what throw and push need on
+        every call: group names, a getter of their sizes, and the
+        locked faces of every position by result offsets.
+        """
+        super().__init_subclass__(**kwargs)
+        cls.group_names = spec_groups(cls.spec)
+        getter = attrgetter(*cls.group_names)
+        cls.sizes_of = getter if len(cls.group_names) > 1 else lambda pool: (getter(pool),)
+        cls.locks = {}
+
+    def sizes(self):
+        """Number of dice of every group.
+        """
+        return self.sizes_of(self)
+
+    def throw_extra(self):
+        return ()
+
+    def push_extra(self, res):
+        return ()
 
     def throw(self):
         """Throw the dice and set the thrown state on.
         """
         if self.thrown:
             return self.result
-        dice = SimpleDie()
-        for n in range(self.attr):
-            self.result['attr'].append(dice.throw())
-        for n in range(self.skill):
-            self.result['skill'].append(dice.throw())
-        for n in range(self.gear):
-            self.result['gear'].append(dice.throw())
+        offsets = group_offsets(*self.sizes_of(self))
+        self.result = DiceResult(self.group_names, throw_d6(self.rng, offsets[-1]), offsets,
+                                 self.throw_extra())
         self.thrown = True
         return self.result
 
+    def push_plan(self, offsets):
+        """(ends of the added groups, offsets after the push, locked
+        faces of every die) of pushing a result of <offsets>.
+        """
+        plan = self.locks.get(offsets)
+        if plan is None:
+            ends = []
+            sizes = []
+            locks = []
+            for i, group in enumerate(self.spec.groups):
+                size = offsets[i + 1] - offsets[i]
+                if group.name in self.spec.added:
+                    ends.append(offsets[i + 1])
+                    size += 1
+                sizes.append(size)
+                locks.extend([group.locked] * size)
+            plan = self.locks[offsets] = (tuple(ends), group_offsets(*sizes), tuple(locks))
+        return plan
+
+    def push_result(self, res):
+        """Push <res> and return the new DiceResult. The added groups
+        get a 0 face at their end, which is never locked, so their new
+        die is drawn in the same pass as the rerolls.
+        """
+        extra = self.push_extra(res)
+        ends, offsets, locks = self.push_plan(res.offsets)
+        faces = res.faces
+        if ends:
+            pieces = []
+            start = 0
+            for end in ends:
+                pieces += (faces[start:end], b'\0')
+                start = end
+            pieces.append(faces[start:])
+            faces = b''.join(pieces)
+        return DiceResult(res.groups, reroll(self.rng, faces, locks), offsets, extra)
+
     def push(self):
-        """Push the dice and set the thrown state on.
+        """Push the dice and set the pushed state on.
         """
         if self.pushed:
             return self.pushed_res
-        dice = SimpleDie()
-        for r in self.result['attr']:
-            if r == 1 or r == 6:
-                self.pushed_res['attr'].append(r)
-            else:
-                self.pushed_res['attr'].append(dice.throw())
-        for r in self.result['skill']:
-            if r == 6:
-                self.pushed_res['skill'].append(r)
-            else:
-                self.pushed_res['skill'].append(dice.throw())
-        for r in self.result['gear']:
-            if r == 1 or r == 6:
-                self.pushed_res['gear'].append(r)
-            else:
-                self.pushed_res['gear'].append(dice.throw())
+        self.pushed_res = self.push_result(self.result)
         self.pushed = True
         return self.pushed_res
 
+    def pool_spec(self):
+        """(PoolSpec, sizes) of the whole pool for the batch and exact
+        engines.
+        """
+        return self.spec, self.sizes()
+
+    def batch_rng(self, rng):
+        if rng is None:
+            rng = getattr(self.rng, 'generator', None)
+        return rng
+
+    def throw_many(self, n, rng=None):
+        """Throw <n> pools of this size at once with the NumPy batch
+        engine. Returns a (n, dice) array of faces, groups one after the
+        other. <rng> is a numpy.random.Generator, by default the one of
+        the pool if it was built with a Generator.
+        """
+        from yze import batch
+        return batch.spec_throw(*self.pool_spec(), n, self.batch_rng(rng))
+
+    def push_many(self, faces, rng=None):
+        """Push every roll returned by throw_many, or by push_many, at
+        once. Returns a new array of faces.
+        """
+        from yze import batch
+        return batch.spec_push(*self.pool_spec(), faces, self.batch_rng(rng))
+
+    def count_many(self, faces):
+        """Return a dict of arrays with the successes and the botches of
+        every roll in <faces>.
+        """
+        from yze import batch
+        return batch.spec_counts(*self.pool_spec(), faces)
+
+    def distribution(self, pushes=0):
+        """Exact joint distribution of (successes, botches...) after
+        <pushes> pushes, botches being in the order of the groups.
+        """
+        from yze import exact
+        return exact.spec_distribution(*self.pool_spec(), pushes)
+
+
+MUTANT_GROUPS = spec_groups(MUTANT_SPEC)
+MUTANT_EMPTY = DiceResult.from_groups(MUTANT_GROUPS, ((), (), ()))
+
+
+class MutantDicePool(SpecPool):
+    """Emulate the dice pool found in Mutant: Year Zero. The
+    MutantDicePool object can only make one throw and then one
+    push. To make another throw, you’ll need to create a new object.
+    """
+    __slots__ = ('rng', 'attr', 'skill', 'gear', 'thrown', 'pushed', 'result', 'pushed_res')
+    spec = MUTANT_SPEC
+
+    def __init__(self, attr=1, skill=0, gear=0, rng=None):
+        """Build the object. Results are stored in two DiceResult. thrown
+        and push are state attributes. <rng> is given to as_source.
+        """
+        self.rng = as_source(rng)
+        self.attr = attr
+        self.skill = skill
+        self.gear = gear
+        self.thrown = False
+        self.pushed = False
+        self.result = MUTANT_EMPTY
+        self.pushed_res = MUTANT_EMPTY
+
 
-class FBLDicePool:
+FBL_GROUPS = spec_groups(FBL_SPEC)
+FBL_EMPTY = DiceResult.from_groups(FBL_GROUPS, ((), (), ()), (('artefact', 0),))
+
+
+class FBLDicePool(SpecPool):
     """Emulate the dice pool found in Forbidden Lands. The FBLDicePool
     object can only make one throw and then one push. To make another
     throw, you’ll need to create a new object.
     """
-    def __init__(self, attr=1, skill=0, gear=0, artefact=None):
+    __slots__ = ('rng', 'attr', 'skill', 'gear', 'artefact', 'thrown', 'pushed',
+                 'multipushed', 'result', 'pushed_res', 'multipushed_res')
+    spec = FBL_SPEC
+
+    def __init__(self, attr=1, skill=0, gear=0, artefact=None, rng=None):
         """As MutantDicePool, with artefact. Artefact dice is not a list, but
         an int, showing how many results you get.
         """
+        if artefact is not None:
+            check_size(artefact)
+        self.rng = as_source(rng)
         self.attr = attr
         self.skill = skill
         self.gear = gear
@@ -166,168 +560,167 @@ class FBLDicePool:
         self.thrown = False
         self.pushed = False
         self.multipushed = False
-        self.result = {'attr': [], 'skill': [], 'gear': [], 'artefact': 0}
-        self.pushed_res = {'attr': [], 'skill': [], 'gear': [], 'artefact': 0}
-        self.multipushed_res = {'attr': [], 'skill': [], 'gear': [], 'artefact': 0}
+        self.result = FBL_EMPTY
+        self.pushed_res = FBL_EMPTY
+        self.multipushed_res = FBL_EMPTY
 
-    def throw(self):
-        """Throw the dice and set the thrown state on.
-        """
-        if self.thrown:
-            return self.result
-        dice = SimpleDie()
-        for n in range(self.attr):
-            self.result['attr'].append(dice.throw())
-        for n in range(self.skill):
-            self.result['skill'].append(dice.throw())
-        for n in range(self.gear):
-            self.result['gear'].append(dice.throw())
+    def throw_extra(self):
+        artefact = 0
         if self.artefact is not None:
-            artefact_dice = ArtefactDie(size=self.artefact)
-            self.result['artefact'] = artefact_dice.throw()
-        self.thrown = True
-        return self.result
+            artefact = self.throw_artefact()
+        return (('artefact', artefact),)
 
-    def push(self):
-        """Push the dice and set the pushed state on.
+    def throw_artefact(self):
+        """Throw the artefact die, returns (face, successes).
         """
-        if self.pushed:
-            return self.pushed_res
-        dice = SimpleDie()
-        for r in self.result['attr']:
-            if r == 1 or r == 6:
-                self.pushed_res['attr'].append(r)
-            else:
-                self.pushed_res['attr'].append(dice.throw())
-        for r in self.result['skill']:
-            if r == 6:
-                self.pushed_res['skill'].append(r)
-            else:
-                self.pushed_res['skill'].append(dice.throw())
-        for r in self.result['gear']:
-            if r == 1 or r == 6:
-                self.pushed_res['gear'].append(r)
-            else:
-                self.pushed_res['gear'].append(dice.throw())
+        res = self.rng.face(self.artefact)
+        return (res, ARTEFACT_SUCCESSES[self.artefact][res])
+
+    def push_extra(self, res):
+        """The artefact die is thrown again unless it got successes.
+        """
+        artefact = 0
         if self.artefact is not None:
-            if self.result['artefact'][1] == 0:
-                artefact_dice = ArtefactDie(self.artefact)
-                self.pushed_res['artefact'] = artefact_dice.throw()
+            if res['artefact'][1] == 0:
+                artefact = self.throw_artefact()
             else:
-                self.pushed_res['artefact'] = self.result['artefact']
-
-        self.pushed = True
-        return self.pushed_res
+                artefact = res['artefact']
+        return (('artefact', artefact),)
 
     def multipush(self):
         """Dwarves can multipush without limit...
         """
         if not self.pushed and self.thrown:
-            return self.push(self)
+            return self.push()
         if self.multipushed:
             """Permit multipush to be repeated to the point were you have 6 or 1
             everywhere. This is destructive, we don’t keep track of
             all results.
             """
             self.pushed_res = self.multipushed_res
-            self.multipushed_res = {'attr': [], 'skill': [], 'gear': [], 'artefact': 0}
-        dice = SimpleDie()
-        for r in self.pushed_res['attr']:
-            if r == 1 or r == 6:
-                self.multipushed_res['attr'].append(r)
-            else:
-                self.multipushed_res['attr'].append(dice.throw())
-        for r in self.pushed_res['skill']:
-            if r == 6:
-                self.multipushed_res['skill'].append(r)
-            else:
-                self.multipushed_res['skill'].append(dice.throw())
-        for r in self.pushed_res['gear']:
-            if r == 1 or r == 6:
-                self.multipushed_res['gear'].append(r)
-            else:
-                self.multipushed_res['gear'].append(dice.throw())
-        if self.artefact is not None:
-            if self.pushed_res['artefact'][1] == 0:
-                artefact_dice = ArtefactDie(self.artefact)
-                self.multipushed_res['artefact'] = artefact_dice.throw()
-            else:
-                self.multipushed_res['artefact'] = self.pushed_res['artefact']
+        self.multipushed_res = self.push_result(self.pushed_res)
         self.multipushed = True
         return self.multipushed_res
 
+    def pool_spec(self):
+        """The artefact die, if any, is a last group of one die.
+        """
+        if self.artefact is None:
+            return FBL_SPEC, self.sizes()
+        return fbl_spec(self.artefact), self.sizes() + (1,)
+
+    def last_result(self):
+        """The result of the last throw, push or multipush.
+        """
+        if self.multipushed:
+            return self.multipushed_res
+        if self.pushed:
+            return self.pushed_res
+        return self.result
+
+    def chain_state(self):
+        """(states, artefact) of the last result for the Markov chain of
+        exact.fbl_chain_distribution.
+        """
+        from yze import exact
+        res = self.last_result()
+        artefact = None
+        if self.artefact is not None:
+            artefact = (self.artefact, res['artefact'][0])
+        return exact.fbl_push_state(res['attr'], res['skill'], res['gear'], artefact)
+
+    def multipush_distribution(self, pushes=None):
+        """Exact joint distribution of (successes, attribute banes, gear
+        banes) after <pushes> more pushes of the thrown pool, or when
+        every die is locked when <pushes> is None.
+        """
+        from yze import exact
+        return exact.fbl_chain_distribution(*self.chain_state(), pushes)
+
+    def expected_pushes(self):
+        """Expected number of pushes left before every die of the thrown
+        pool is locked.
+        """
+        from yze import exact
+        return exact.fbl_expected_pushes(*self.chain_state())
+
 
-class AlienDicePool:
+ALIEN_GROUPS = spec_groups(ALIEN_SPEC)
+ALIEN_EMPTY = DiceResult.from_groups(ALIEN_GROUPS, ((), ()))
+
+
+class AlienDicePool(SpecPool):
     """Emulate the Alien dice pool throw, push and multipush."""
-    def __init__(self, pool=1, stress=0):
+    __slots__ = ('rng', 'pool', 'stress', 'thrown', 'pushed', 'multipushed',
+                 'result', 'pushed_res', 'multipushed_res')
+    spec = ALIEN_SPEC
+
+    def __init__(self, pool=1, stress=0, rng=None):
+        self.rng = as_source(rng)
         self.pool = pool
         self.stress = stress
         self.thrown = False
         self.pushed = False
         self.multipushed = False
-        self.result = {'pool': [], 'stress': []}
-        self.pushed_res = {'pool': [], 'stress': []}
-        self.multipushed_res = {'pool': [], 'stress': []}
-
-    def throw(self):
-        """Throw the dice and set the thrown state on.
-        """   
-        if self.thrown:
-            return self.result
-        dice = SimpleDie()
-        for n in range(self.pool):
-            self.result['pool'].append(dice.throw())
-        for n in range(self.stress):
-            self.result['stress'].append(dice.throw())
-        self.thrown = True
-        return self.result
-
-    def push(self):
-        """Push the dice adding a stress die and set the pushed state on.
-        """
-        if self.pushed:
-            return self.pushed_res
-        dice = SimpleDie()
-        for r in self.result['pool']:
-            if r == 6:
-                self.pushed_res['pool'].append(r)
-            else:
-                self.pushed_res['pool'].append(dice.throw())
-        for r in self.result['stress'] + [2]:
-            if r == 6:
-                self.pushed_res['stress'].append(r)
-            else:
-                self.pushed_res['stress'].append(dice.throw())
-
-        self.pushed = True
-        return self.pushed_res
+        self.result = ALIEN_EMPTY
+        self.pushed_res = ALIEN_EMPTY
+        self.multipushed_res = ALIEN_EMPTY
 
     def multipush(self):
         """Push the dice a second time adding a stress die and set the
-        multipushed state on.
+        multipushed state on. A multipush right after the throw is the
+        push.
         """
+        if not self.pushed and self.thrown:
+            return self.push()
         if self.multipushed:
             return self.multipushed_res
-        dice = SimpleDie()
-        for r in self.pushed_res['pool']:
-            if r == 6:
-                self.multipushed_res['pool'].append(r)
-            else:
-                self.multipushed_res['pool'].append(dice.throw())
-        for r in self.pushed_res['stress'] + [2]:
-            if r == 6:
-                self.multipushed_res['stress'].append(r)
-            else:
-                self.multipushed_res['stress'].append(dice.throw())
-
+        self.multipushed_res = self.push_result(self.pushed_res)
         self.multipushed = True
         return self.multipushed_res
 
 
-class Twilight2000DicePool:
+class StepDicePool:
+    """Throw and push of step dice pools, Twilight 2000 and Blade
+    Runner. A die is a (face, successes) pair, it is pushed when it
+    got fewer successes than asked.
+    """
+    __slots__ = ()
+
+    def value_to_dice(self, value):
+        """Throw the step die of an attribute or skill value, A to D.
+        Returns (face, successes), or None without a value.
+        """
+        if value is None:
+            return None
+        if value not in STEP_DICE:
+            raise ValueError(f"Step value should be one of A, B, C, D. {value} was provided.")
+        return self.make_dice_and_throw(dice_size=STEP_DICE[value])
+
+    def make_dice_and_throw(self, dice_size):
+        """Throw a step die of <dice_size>, returns (face, successes).
+        """
+        res = self.rng.face(dice_size)
+        return (res, STEP_SUCCESSES[dice_size][res])
+
+    def check_res_and_push(self, res, value, push_below=1):
+        """Push the die of <value> unless its result <res> has at least
+        <push_below> successes.
+        """
+        if res[1] >= push_below:
+            return res
+        return self.value_to_dice(value=value)
+
+
+class Twilight2000DicePool(StepDicePool):
     """Emulate the Twilight 2000 dice pool, ammo throw, push
     """
-    def __init__(self, attr="D", skill=None, ammo=None):
+    __slots__ = ('rng', 'attr', 'skill', 'ammo', 'thrown', 'pushed', 'multipushed',
+                 'hit_locationed', 'hit_location_res', 'result', 'pushed_res',
+                 'multipushed_res')
+
+    def __init__(self, attr="D", skill=None, ammo=None, rng=None):
+        self.rng = as_source(rng)
         self.attr = attr
         self.skill = skill
         self.ammo = ammo
@@ -336,31 +729,9 @@ class Twilight2000DicePool:
         self.multipushed = False
         self.hit_locationed = False
         self.hit_location_res = ''
-        self.result = {}
-        self.pushed_res = {}
-        self.multipushed_res = {}
-
-    def value_to_dice(self, value):
-        """Return the StepDie object according to the attribute or
-        skill value.
-        """
-        match value:
-            case "A":
-                return self.make_dice_and_throw(dice_size=12)
-            case "B":
-                return self.make_dice_and_throw(dice_size=10)
-            case "C":
-                return self.make_dice_and_throw(dice_size=8)
-            case "D":
-                return self.make_dice_and_throw(dice_size=6)
-            case None:
-                return None
-            case _:
-                raise ValueError
-
-    def make_dice_and_throw(self, dice_size):
-        d = StepDie(size=dice_size)
-        return d.throw()
+        self.result = EMPTY_RESULT
+        self.pushed_res = EMPTY_RESULT
+        self.multipushed_res = EMPTY_RESULT
 
     def throw(self):
         """Throw the dice and set the thrown state on.
@@ -369,89 +740,62 @@ class Twilight2000DicePool:
             return self.result
         attr_res = self.value_to_dice(value=self.attr)
         skill_res = self.value_to_dice(value=self.skill)
-        if self.ammo:
-            self.result['ammo'] = []
-            d = SimpleDie()
-            for a in range(self.ammo):
-                self.result['ammo'].append(d.throw())
+        extra = []
         if attr_res:
-            self.result['attr'] = attr_res
+            extra.append(('attr', attr_res))
         if skill_res:
-            self.result['skill'] = skill_res
+            extra.append(('skill', skill_res))
+        if self.ammo:
+            faces = throw_d6(self.rng, self.ammo)
+            self.result = DiceResult(('ammo',), faces, group_offsets(self.ammo), tuple(extra))
+        else:
+            self.result = DiceResult(extra=tuple(extra))
         self.thrown = True
         return self.result
 
     def hit_location(self):
         if self.hit_locationed:
             return self.hit_location_res
-        self.hit_location_res = HitLocationDie().throw()
+        self.hit_location_res = HitLocationDie(rng=self.rng).throw()
         self.hit_locationed = True
         return self.hit_location_res
 
-    def check_res_and_push(self, res, value):
-        """Push the dice unless it already has two success or one
-        success while even_one_success is set to False
-        """
-        if res[1] >= 1:
-            return res
-        return self.value_to_dice(value=value)
-
     def push(self):
         """Push all dice you can push
         """
         if self.pushed:
             return self.pushed_res
+        extra = []
         if 'attr' in self.result:
-            self.pushed_res['attr'] = self.check_res_and_push(self.result['attr'], self.attr)
+            extra.append(('attr', self.check_res_and_push(self.result['attr'], self.attr)))
         if 'skill' in self.result:
-            self.pushed_res['skill'] = self.check_res_and_push(self.result['skill'], self.skill)
+            extra.append(('skill', self.check_res_and_push(self.result['skill'], self.skill)))
         if 'ammo' in self.result:
-            d = SimpleDie()
-            self.pushed_res['ammo'] = []
-            for r in self.result['ammo']:
-                if r == 1 or r == 6:
-                    self.pushed_res['ammo'].append(r)
-                else:
-                    self.pushed_res['ammo'].append(d.throw())
+            ammo = reroll(self.rng, self.result.faces, ((1, 6),) * self.ammo)
+            self.pushed_res = DiceResult(('ammo',), ammo, self.result.offsets, tuple(extra))
+        else:
+            self.pushed_res = DiceResult(extra=tuple(extra))
         self.pushed = True
         return self.pushed_res
 
 
-class BladeRunnerDicePool():
+class BladeRunnerDicePool(StepDicePool):
     """Emulate the Blade Runner dice pool avantage, disavantage,
     throw, push and multipush."""
-    def __init__(self, attr="D", skill="D", advantage=None):
+    __slots__ = ('rng', 'attr', 'skill', 'advantage', 'thrown', 'pushed', 'multipushed',
+                 'result', 'pushed_res', 'multipushed_res')
+
+    def __init__(self, attr="D", skill="D", advantage=None, rng=None):
+        self.rng = as_source(rng)
         self.attr = attr
         self.skill = skill
         self.advantage = advantage
         self.thrown = False
         self.pushed = False
         self.multipushed = False
-        self.result = {}
-        self.pushed_res = {}
-        self.multipushed_res = {}
-
-    def value_to_dice(self, value):
-        """Return the StepDie object according to the attribute or
-        skill value.
-        """
-        match value:
-            case "A":
-                return self.make_dice_and_throw(dice_size=12)
-            case "B":
-                return self.make_dice_and_throw(dice_size=10)
-            case "C":
-                return self.make_dice_and_throw(dice_size=8)
-            case "D":
-                return self.make_dice_and_throw(dice_size=6)
-            case None:
-                return None
-            case _:
-                raise ValueError
-
-    def make_dice_and_throw(self, dice_size):
-        d = StepDie(size=dice_size)
-        return d.throw()
+        self.result = EMPTY_RESULT
+        self.pushed_res = EMPTY_RESULT
+        self.multipushed_res = EMPTY_RESULT
 
     def throw(self):
         """Throw the dice and set the thrown state on.
@@ -472,12 +816,14 @@ class BladeRunnerDicePool():
                 self.attr = None
         attr_res = self.value_to_dice(value=self.attr)
         skill_res = self.value_to_dice(value=self.skill)
+        extra = []
         if attr_res:
-            self.result['attr'] = attr_res
+            extra.append(('attr', attr_res))
         if skill_res:
-            self.result['skill'] = skill_res
+            extra.append(('skill', skill_res))
         if adv_die_res:
-            self.result['adv_die'] = adv_die_res
+            extra.append(('adv_die', adv_die_res))
+        self.result = DiceResult(extra=tuple(extra))
         self.thrown = True
         return self.result
 
@@ -485,11 +831,7 @@ class BladeRunnerDicePool():
         """Push the dice unless it already has two success or one
         success while even_one_success is set to False
         """
-        if res[1] > 1:
-            return res
-        if res[1] == 1 and not even_one_success:
-            return res
-        return self.value_to_dice(value=value)
+        return super().check_res_and_push(res, value, 2 if even_one_success else 1)
 
     def push(self, even_one_success=False):
 
@@ -497,16 +839,18 @@ class BladeRunnerDicePool():
         """
         if self.pushed:
             return self.pushed_res
+        extra = []
         if 'attr' in self.result:
-            self.pushed_res['attr'] = self.check_res_and_push(self.result['attr'], self.attr, even_one_success)
+            extra.append(('attr', self.check_res_and_push(self.result['attr'], self.attr, even_one_success)))
         if 'skill' in self.result:
-            self.pushed_res['skill'] = self.check_res_and_push(self.result['skill'], self.skill, even_one_success)
+            extra.append(('skill', self.check_res_and_push(self.result['skill'], self.skill, even_one_success)))
         if 'adv_die' in self.result:
             if self.attr < self.skill:
                 adv_die = self.skill
             else:
                 adv_die = self.attr
-            self.pushed_res['adv_die'] = self.check_res_and_push(self.result['adv_die'], adv_die, even_one_success)
+            extra.append(('adv_die', self.check_res_and_push(self.result['adv_die'], adv_die, even_one_success)))
+        self.pushed_res = DiceResult(extra=tuple(extra))
         self.pushed = True
         return self.pushed_res
    
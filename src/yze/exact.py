@@ -0,0 +1,598 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Exact probabilities for YZE dice pools. A distribution is a dict
+mapping an outcome tuple to its probability as a Fraction. Dice are
+independent, so the distribution of a pool is the convolution of the
+distributions of its dice.
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
+
+from yze.dice import ALIEN_SPEC, ARTEFACT_SUCCESSES, MUTANT_SPEC, STEP_DICE, STEP_SUCCESSES, fbl_spec
+
+D6 = range(1, 7)
+SIXTH = Fraction(1, 6)
+
+
+def convolve(a, b):
+    """Distribution of the element wise sum of two independent outcomes.
+    """
+    res = {}
+    for ka, pa in a.items():
+        for kb, pb in b.items():
+            k = tuple(x + y for x, y in zip(ka, kb))
+            res[k] = res.get(k, 0) + pa * pb
+    return res
+
+
+def power(dist, n):
+    """Distribution of the sum of <n> independent outcomes of <dist>.
+    """
+    width = len(next(iter(dist)))
+    res = {(0,) * width: Fraction(1)}
+    for i in range(n):
+        res = convolve(res, dist)
+    return res
+
+
+def marginal(dist, index):
+    """Distribution of the <index> element of the outcome tuples.
+    """
+    res = {}
+    for k, p in dist.items():
+        res[k[index]] = res.get(k[index], 0) + p
+    return res
+
+
+@lru_cache(maxsize=None)
+def mutant_die(name):
+    """Distribution of one die of the group <name> of MUTANT_SPEC over
+    (successes, pushed successes, attribute botches, gear botches),
+    botches being counted after the push. It is the spec_joint_die of
+    the group without the botches of the first roll.
+    """
+    width, indexes = spec_layout(MUTANT_SPEC)
+    position = [group.name for group in MUTANT_SPEC.groups].index(name)
+    dist = {}
+    joint = spec_joint_die(MUTANT_SPEC.groups[position], indexes[position], width, 1)
+    for (successes, _, _, pushed, attr, gear), p in joint.items():
+        k = (successes, pushed, attr, gear)
+        dist[k] = dist.get(k, 0) + p
+    return dist
+
+
+@lru_cache(maxsize=None)
+def mutant_distribution(attr=1, skill=0, gear=0):
+    """Exact joint distribution of (successes, pushed successes,
+    attribute botches, gear botches) of a Mutant pool thrown then
+    pushed. A pool is its neighbour with one die less convolved with
+    that die, so a sweep over pools makes one convolution per pool.
+    """
+    if gear:
+        return convolve(mutant_distribution(attr, skill, gear - 1), mutant_die('gear'))
+    if skill:
+        return convolve(mutant_distribution(attr, skill - 1, 0), mutant_die('skill'))
+    if attr:
+        return convolve(mutant_distribution(attr - 1, 0, 0), mutant_die('attr'))
+    return {(0, 0, 0, 0): Fraction(1)}
+
+
+def at_least_one(dist):
+    """Probability of a marginal distribution to be 1 or more.
+    """
+    return sum(p for k, p in dist.items() if k > 0)
+
+
+def without_zero(dist):
+    """Marginal distribution as floats, leaving out zero as the
+    benchmark results do.
+    """
+    return {k: float(p) for k, p in sorted(dist.items()) if k > 0 and p}
+
+
+def mutant_results(attr=1, skill=0, gear=0):
+    """Same dict as benchmark_mutant.multiple_throws, with
+    probabilities in place of counts. Use it with throws=1.
+    """
+    dist = mutant_distribution(int(attr), int(skill), int(gear))
+    successes = marginal(dist, 0)
+    pushed_successes = marginal(dist, 1)
+    attribute_botched = marginal(dist, 2)
+    gear_botched = marginal(dist, 3)
+    return {
+        'atleast_one': float(at_least_one(successes)),
+        'atleast_one_pushed': float(at_least_one(pushed_successes)),
+        'atleast_one_attr_botch': float(at_least_one(attribute_botched)),
+        'atleast_one_gear_botch': float(at_least_one(gear_botched)),
+        'successes': without_zero(successes),
+        'pushed_successes': without_zero(pushed_successes),
+        'attribute_botched': without_zero(attribute_botched),
+        'gear_botched': without_zero(gear_botched),
+    }
+
+
+def rerolled_die(botch):
+    """Distribution of one rerolled Mutant die over (successes,
+    attribute botches, gear botches). <botch> is the index where a 1
+    is counted, or None for skill dice.
+    """
+    dist = {}
+    for face in D6:
+        k = [int(face == 6), 0, 0]
+        if botch is not None and face == 1:
+            k[botch] = 1
+        k = tuple(k)
+        dist[k] = dist.get(k, 0) + SIXTH
+    return dist
+
+
+REROLLED_ATTR_DIE = rerolled_die(botch=1)
+REROLLED_SKILL_DIE = rerolled_die(botch=None)
+REROLLED_GEAR_DIE = rerolled_die(botch=2)
+
+
+@lru_cache(maxsize=None)
+def mutant_push_odds(attr=0, skill=0, gear=0, successes=0, attr_botches=0, gear_botches=0):
+    """Exact distribution of (successes, attribute botches, gear
+    botches) once a roll is pushed. <attr>, <skill> and <gear> are the
+    numbers of rerolled dice, the others count the locked dice.
+    """
+    dist = power(REROLLED_ATTR_DIE, attr)
+    dist = convolve(dist, power(REROLLED_SKILL_DIE, skill))
+    dist = convolve(dist, power(REROLLED_GEAR_DIE, gear))
+    return convolve(dist, {(successes, attr_botches, gear_botches): Fraction(1)})
+
+
+def mutant_push_state(attribute, skill, gear):
+    """Reduce a Mutant roll, three lists of faces, to the arguments of
+    mutant_push_odds. Dice order does not matter.
+    """
+    return (
+        len([x for x in attribute if x not in (1, 6)]),
+        len([x for x in skill if x != 6]),
+        len([x for x in gear if x not in (1, 6)]),
+        len([x for x in (*attribute, *skill, *gear) if x == 6]),
+        len([x for x in attribute if x == 1]),
+        len([x for x in gear if x == 1]),
+    )
+
+
+def mutant_push_results(attribute, skill, gear):
+    """Same dict as mutant_odds_of_pushing.multiple_throws, with
+    probabilities in place of counts. Use it with throws=1.
+    """
+    dist = mutant_push_odds(*mutant_push_state(attribute, skill, gear))
+    pushed_successes = marginal(dist, 0)
+    attribute_botched = marginal(dist, 1)
+    gear_botched = marginal(dist, 2)
+    return {
+        'atleast_one_pushed': float(at_least_one(pushed_successes)),
+        'atleast_one_attr_botch': float(at_least_one(attribute_botched)),
+        'atleast_one_gear_botch': float(at_least_one(gear_botched)),
+        'pushed_successes': without_zero(pushed_successes),
+        'attribute_botched': without_zero(attribute_botched),
+        'gear_botched': without_zero(gear_botched),
+    }
+
+
+def locking_die(size, locked, pushes):
+    """Distribution of one die thrown then pushed <pushes> times. Faces
+    in the <locked> dict are kept and give their outcome tuple, other
+    faces are rerolled and give nothing if they are still showing
+    after the last push.
+    """
+    width = len(next(iter(locked.values())))
+    dist = {}
+    free = Fraction(1)
+    for push in range(pushes + 1):
+        for outcome in locked.values():
+            dist[outcome] = dist.get(outcome, 0) + free / size
+        free *= Fraction(size - len(locked), size)
+    dist[(0,) * width] = dist.get((0,) * width, 0) + free
+    return dist
+
+
+def fbl_distribution(attr=1, skill=0, gear=0, artefact=None, pushes=0):
+    """Exact joint distribution of (successes, attribute banes, gear
+    banes) of a Forbidden Lands pool after <pushes> pushes: 0 for the
+    first roll, 1 for a push, more for a dwarf multipushing. <artefact>
+    is the size of the artefact die, if any.
+    """
+    sizes = (attr, skill, gear) if artefact is None else (attr, skill, gear, 1)
+    return spec_distribution(fbl_spec(artefact), sizes, pushes)
+
+
+def fbl_results(attr=1, skill=0, gear=0, artefact=None, pushes=0):
+    """Odds of a Forbidden Lands pool after <pushes> pushes, as a dict
+    of probabilities.
+    """
+    dist = fbl_distribution(int(attr), int(skill), int(gear), artefact, int(pushes))
+    successes = marginal(dist, 0)
+    attribute_banes = marginal(dist, 1)
+    gear_banes = marginal(dist, 2)
+    return {
+        'atleast_one': float(at_least_one(successes)),
+        'atleast_one_attr_bane': float(at_least_one(attribute_banes)),
+        'atleast_one_gear_bane': float(at_least_one(gear_banes)),
+        'successes': without_zero(successes),
+        'attribute_banes': without_zero(attribute_banes),
+        'gear_banes': without_zero(gear_banes),
+    }
+
+
+# A dwarf multipushing a Forbidden Lands pool is an absorbing Markov
+# chain. The state of a die group is (locked 6s, locked 1s, free dice),
+# each push moves free dice to the locked counts and the chain is
+# absorbed once no die is free. Groups are independent, so a pool is
+# followed group by group and the outcomes convolved.
+FBL_LOCKED = ((1, 6), (6,), (1, 6))
+
+
+def chain_step(dist, locked):
+    """Push once every state of <dist>, a distribution of (6s, 1s,
+    free) states of a group whose dice lock on <locked> faces.
+    """
+    p_one = SIXTH if 1 in locked else Fraction(0)
+    p_free = 1 - SIXTH - p_one
+    res = {}
+    for (sixes, ones, free), p in dist.items():
+        for a in range(free + 1):
+            for b in range(free - a + 1 if p_one else 1):
+                q = comb(free, a) * comb(free - a, b) * SIXTH ** a * p_one ** b * p_free ** (free - a - b)
+                k = (sixes + a, ones + b, free - a - b)
+                res[k] = res.get(k, 0) + p * q
+    return res
+
+
+def chain_limit(state, locked):
+    """Absorbed distribution of a group in <state>: a free die ends on
+    any of its <locked> faces with the same odds.
+    """
+    sixes, ones, free = state
+    if 1 not in locked:
+        return {(sixes + free, ones, 0): Fraction(1)}
+    return {(sixes + a, ones + free - a, 0): Fraction(comb(free, a), 2 ** free)
+            for a in range(free + 1)}
+
+
+def artefact_chain(artefact, pushes):
+    """Distribution of the (successes, 0, 0) of an artefact die (size,
+    locked successes, 0 when free) pushed <pushes> times, None for the
+    limit.
+    """
+    size, successes = artefact
+    if successes or pushes == 0:
+        return {(successes, 0, 0): Fraction(1)}
+    group = fbl_spec(size).groups[-1]
+    if pushes is None:
+        dist = {}
+        for face in group.locked:
+            outcome = face_outcome(group, face, 0, 3)
+            dist[outcome] = dist.get(outcome, 0) + Fraction(1, len(group.locked))
+        return dist
+    return spec_die(group, 0, 3, pushes)
+
+
+@lru_cache(maxsize=None)
+def fbl_chain_distribution(states, artefact=None, pushes=None):
+    """Exact joint distribution of (successes, attribute banes, gear
+    banes) of a Forbidden Lands pool after <pushes> more pushes, None
+    for the limit of a dwarf pushing until every die is locked.
+    <states> are the (6s, 1s, free) of the attribute, skill and gear
+    groups, <artefact> is (size, locked successes) or None.
+    """
+    dist = {(0, 0, 0): Fraction(1)}
+    for index, (state, locked) in enumerate(zip(states, FBL_LOCKED)):
+        if pushes is None:
+            group = chain_limit(state, locked)
+        else:
+            group = {state: Fraction(1)}
+            for push in range(pushes):
+                group = chain_step(group, locked)
+        outcomes = {}
+        for (sixes, ones, free), p in group.items():
+            k = (sixes, ones if index == 0 else 0, ones if index == 2 else 0)
+            outcomes[k] = outcomes.get(k, 0) + p
+        dist = convolve(dist, outcomes)
+    if artefact is not None:
+        dist = convolve(dist, artefact_chain(artefact, pushes))
+    return dist
+
+
+def fbl_push_state(attribute, skill, gear, artefact=None):
+    """Reduce a Forbidden Lands roll, three lists of faces and the
+    (size, face) of the artefact die if any, to the states and
+    artefact of fbl_chain_distribution.
+    """
+    states = tuple((len([x for x in faces if x == 6]),
+                    len([x for x in faces if x == 1 and 1 in locked]),
+                    len([x for x in faces if x not in locked]))
+                   for faces, locked in zip((attribute, skill, gear), FBL_LOCKED))
+    if artefact is not None:
+        size, face = artefact
+        artefact = (size, ARTEFACT_SUCCESSES[size][face])
+    return states, artefact
+
+
+@lru_cache(maxsize=None)
+def absorption_pushes(both, sixes, artefact=None):
+    """Expected number of pushes until <both> free dice locking on 1 and
+    6, <sixes> free dice locking on 6, and a free artefact die of size
+    <artefact> are all locked. Free counts only go down, so each state
+    only needs the states below it.
+    """
+    if not both and not sixes and artefact is None:
+        return Fraction(0)
+    p_artefact = Fraction(0)
+    if artefact is not None:
+        p_artefact = Fraction(len([x for x in ARTEFACT_SUCCESSES[artefact][1:] if x]), artefact)
+    both_left = [comb(both, k) * Fraction(2, 3) ** k * Fraction(1, 3) ** (both - k) for k in range(both + 1)]
+    sixes_left = [comb(sixes, k) * Fraction(5, 6) ** k * SIXTH ** (sixes - k) for k in range(sixes + 1)]
+    artefact_left = [(artefact, 1 - p_artefact)] if artefact is not None else []
+    artefact_left.append((None, p_artefact if artefact is not None else Fraction(1)))
+    stay = Fraction(0)
+    total = Fraction(1)
+    for b, pb in enumerate(both_left):
+        for s, ps in enumerate(sixes_left):
+            for a, pa in artefact_left:
+                p = pb * ps * pa
+                if (b, s, a) == (both, sixes, artefact):
+                    stay = p
+                elif p:
+                    total += p * absorption_pushes(b, s, a)
+    return total / (1 - stay)
+
+
+def fbl_expected_pushes(states, artefact=None):
+    """Expected number of pushes of a dwarf pushing until every die is
+    locked, see fbl_chain_distribution for <states> and <artefact>.
+    """
+    both = states[0][2] + states[2][2]
+    size = artefact[0] if artefact is not None and not artefact[1] else None
+    return absorption_pushes(both, states[1][2], size)
+
+
+def alien_distribution(pool=1, stress=0, pushes=0):
+    """Exact joint distribution of (successes, stress dice showing 1)
+    of an Alien pool after <pushes> pushes, each push adding a stress
+    die.
+    """
+    return spec_distribution(ALIEN_SPEC, (pool, stress), pushes)
+
+
+def alien_results(pool=1, stress=0, pushes=0):
+    """Same dicts as benchmark_alien.multiple_throws, with
+    probabilities in place of counts. Use it with throws=1.
+    """
+    levels = []
+    for level in range(int(pushes) + 1):
+        dist = alien_distribution(int(pool), int(stress), level)
+        successes = marginal(dist, 0)
+        levels.append({
+            'atleast_one': float(at_least_one(successes)),
+            'panic': float(at_least_one(marginal(dist, 1))),
+            'successes': without_zero(successes),
+        })
+    return levels
+
+
+def face_outcome(group, face, index, width):
+    """Outcome of <width> values of a die of the DieGroup <group>
+    showing <face>, its botches being at <index>.
+    """
+    outcome = [0] * width
+    if group.successes is not None:
+        outcome[0] = group.successes[face]
+    elif face == 6:
+        outcome[0] = 1
+    if face == 1 and group.botch is not None:
+        outcome[index] = 1
+    return tuple(outcome)
+
+
+def spec_die(group, index, width, rolls):
+    """Distribution of one die of the DieGroup <group> rolled up to
+    <rolls> times, over (successes, botches...) of <width> values, its
+    botches being at <index>. A locked face stops the rolls, the last
+    roll gives its outcome whatever the face.
+    """
+    dist = {}
+    free = Fraction(1)
+    side = Fraction(1, group.size)
+    for roll in range(rolls):
+        last = roll == rolls - 1
+        for face in range(1, group.size + 1):
+            if last or face in group.locked:
+                outcome = face_outcome(group, face, index, width)
+                dist[outcome] = dist.get(outcome, 0) + free * side
+        free *= Fraction(group.size - len(group.locked), group.size)
+    return dist
+
+
+def spec_layout(spec):
+    """Width of the outcomes of <spec> and the index of the botches of
+    each of its groups, 0 for none.
+    """
+    botches = [group.botch for group in spec.groups if group.botch is not None]
+    return 1 + len(botches), [botches.index(group.botch) + 1 if group.botch is not None else 0
+                              for group in spec.groups]
+
+
+@lru_cache(maxsize=None)
+def spec_distribution(spec, sizes, pushes=0):
+    """Exact joint distribution of (successes, botches...) of a pool of
+    the PoolSpec <spec> with <sizes> dice per group after <pushes>
+    pushes, botches in the order of the groups having one. Each push
+    adds a die to the added groups.
+    """
+    width, indexes = spec_layout(spec)
+    dist = {(0,) * width: Fraction(1)}
+    for group, size, index in zip(spec.groups, sizes, indexes):
+        dist = convolve(dist, power(spec_die(group, index, width, pushes + 1), size))
+        if group.name in spec.added:
+            for push in range(1, pushes + 1):
+                dist = convolve(dist, spec_die(group, index, width, pushes - push + 1))
+    return dist
+
+
+def spec_joint_die(group, index, width, pushes):
+    """Distribution of one die of <group> over its outcome on the first
+    roll followed by its outcome after <pushes> pushes.
+    """
+    dist = {}
+    side = Fraction(1, group.size)
+    for face in range(1, group.size + 1):
+        first = face_outcome(group, face, index, width)
+        if pushes == 0 or face in group.locked:
+            finals = {first: Fraction(1)}
+        else:
+            finals = spec_die(group, index, width, pushes)
+        for final, p in finals.items():
+            dist[first + final] = dist.get(first + final, 0) + side * p
+    return dist
+
+
+@lru_cache(maxsize=None)
+def spec_joint_distribution(spec, sizes, pushes=1):
+    """Exact joint distribution of the (successes, botches...) of the
+    first roll followed by those after <pushes> pushes, see
+    spec_distribution.
+    """
+    width, indexes = spec_layout(spec)
+    dist = {(0,) * width * 2: Fraction(1)}
+    for group, size, index in zip(spec.groups, sizes, indexes):
+        dist = convolve(dist, power(spec_joint_die(group, index, width, pushes), size))
+        if group.name in spec.added:
+            for push in range(1, pushes + 1):
+                added = spec_die(group, index, width, pushes - push + 1)
+                dist = convolve(dist, {(0,) * width + k: p for k, p in added.items()})
+    return dist
+
+
+def step_die(value, pushed=False, push_below=1):
+    """Distribution of the successes of one step die of <value> (A to
+    D). When <pushed>, the die is thrown again if it got less than
+    <push_below> successes.
+    """
+    size = STEP_DICE[value]
+    table = STEP_SUCCESSES[size]
+    dist = {}
+    for face in range(1, size + 1):
+        if pushed and table[face] < push_below:
+            for again in range(1, size + 1):
+                k = (table[again],)
+                dist[k] = dist.get(k, 0) + Fraction(1, size * size)
+        else:
+            k = (table[face],)
+            dist[k] = dist.get(k, 0) + Fraction(1, size)
+    return dist
+
+
+@lru_cache(maxsize=None)
+def t2k_distribution(attr="D", skill=None, ammo=0, pushed=False):
+    """Exact joint distribution of (successes, ammo dice showing 6,
+    ammo dice showing 1) of a Twilight 2000 pool. Step dice are pushed
+    when they have no success, ammo dice keep their 1s and 6s. Each
+    ammo die is one convolution over the pool with one less.
+    """
+    if ammo:
+        ammo_die = locking_die(6, {6: (0, 1, 0), 1: (0, 0, 1)}, int(pushed))
+        return convolve(t2k_distribution(attr, skill, ammo - 1, pushed), ammo_die)
+    dist = {(0, 0, 0): Fraction(1)}
+    for value in (attr, skill):
+        if value is not None:
+            dist = convolve(dist, {(k, 0, 0): p for (k,), p in step_die(value, pushed).items()})
+    return dist
+
+
+def blade_runner_distribution(attr="D", skill="D", advantage=None, pushed=False, even_one_success=False):
+    """Exact distribution of the successes of a Blade Runner pool,
+    following BladeRunnerDicePool: an advantage adds a die, a
+    disadvantage (advantage=False) removes one.
+    """
+    values = [attr, skill]
+    if advantage:
+        values.append(skill if attr < skill else attr)
+    elif advantage is False:
+        values = [attr] if attr > skill else [skill]
+    dist = {(0,): Fraction(1)}
+    for value in values:
+        dist = convolve(dist, step_die(value, pushed, 2 if even_one_success else 1))
+    return dist
+
+
+def step_results(dist):
+    """Odds of a step dice pool distribution as a dict of
+    probabilities. Twilight 2000 pools also get the odds of the extra
+    hits given by ammo dice and of a jam, any ammo die showing 1.
+    """
+    successes = marginal(dist, 0)
+    res = {
+        'atleast_one': float(at_least_one(successes)),
+        'successes': without_zero(successes),
+    }
+    if len(next(iter(dist))) == 3:
+        res['ammo_hits'] = without_zero(marginal(dist, 1))
+        res['jam'] = float(at_least_one(marginal(dist, 2)))
+    return res
+
+
+STEP_VALUES = ("A", "B", "C", "D")
+MAX_AMMO = 10
+STEP_TABLE = {}
+
+
+def step_odds(game, attr, skill, option=None, push=None):
+    """Odds of a Twilight 2000 ('t2k') or Blade Runner
+    ('blade_runner') pool. <option> is the number of ammo dice for
+    't2k' and the advantage for 'blade_runner', <push> is None, 'push'
+    or 'even_one_success'. Odds are computed once and then served
+    from STEP_TABLE.
+    """
+    if game == 't2k' and option is None:
+        option = 0
+    key = (game, attr, skill, option, push)
+    res = STEP_TABLE.get(key)
+    if res is None:
+        if game == 't2k':
+            if push == 'even_one_success':
+                raise ValueError("Twilight 2000 dice are only pushed when they fail.")
+            dist = t2k_distribution(attr, skill, option, push is not None)
+        elif game == 'blade_runner':
+            dist = blade_runner_distribution(attr, skill, option, push is not None,
+                                             push == 'even_one_success')
+        else:
+            raise ValueError(f"Unknown step dice game {game}.")
+        res = STEP_TABLE[key] = step_results(dist)
+    return res
+
+
+def step_table():
+    """Fill STEP_TABLE with every pool of both games, up to MAX_AMMO
+    ammo dice, and return it.
+    """
+    for attr in STEP_VALUES:
+        for skill in STEP_VALUES + (None,):
+            for ammo in range(MAX_AMMO + 1):
+                for push in (None, 'push'):
+                    step_odds('t2k', attr, skill, ammo, push)
+            if skill is None:
+                continue
+            for advantage in (None, True, False):
+                for push in (None, 'push', 'even_one_success'):
+                    step_odds('blade_runner', attr, skill, advantage, push)
+    return STEP_TABLE
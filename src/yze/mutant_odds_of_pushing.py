@@ -14,12 +14,19 @@
 # ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
 # OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
 
-from yze.dice import MutantDicePool
-import argparse
+from yze.dice import MUTANT_GROUPS, DiceResult, MutantDicePool
+import sys
 
-def multiple_throws(attribute, skill, gear, throws=100000):
+ODDS_KEYS = ['atleast_one_pushed', 'atleast_one_attr_botch', 'atleast_one_gear_botch']
+LIST_KEYS = ['pushed_successes', 'attribute_botched', 'gear_botched']
+# results of every push state already asked for by a batch, keyed by
+# (state, throws, exact)
+MEMO = {}
+
+
+def multiple_throws(attribute, skill, gear, throws=100000, verbose=True):
     """Throw dice <throws> times, store results in <results>, return
-    results.
+    results. Tell it on stdout if <verbose>.
     """
     results = {
         'atleast_one_pushed': 0,
@@ -29,12 +36,14 @@ def multiple_throws(attribute, skill, gear, throws=100000):
         'attribute_botched': {},
         'gear_botched': {},
     }
-    
-    print(f'Throwing dice {throws} times !')
+
+    if verbose:
+        print(f'Throwing dice {throws} times !')
+    result = DiceResult.from_groups(MUTANT_GROUPS, (attribute, skill, gear))
     for i in range(int(throws)):
         d = MutantDicePool(attr=len(attribute), skill=len(skill), gear=len(gear))
         d.thrown = True
-        d.result = {'attr': attribute, 'skill': skill, 'gear': gear}
+        d.result = result
         pushed_res = d.push()
         pushed_successes = [x for x in d.pushed_res['attr'] + d.pushed_res['skill'] + d.pushed_res['gear'] if x == 6]
         if len(pushed_successes) > 0:
@@ -60,6 +69,11 @@ def multiple_throws(attribute, skill, gear, throws=100000):
     return results
 
 def unpack(args):
+    """Faces of a group given as a string of digits like 253, or as a
+    list of numbers. 0 stands for no die.
+    """
+    if isinstance(args, int):
+        args = str(args)
     unpacked = []
     for att in args:
         att = int(att)
@@ -71,9 +85,99 @@ def unpack(args):
             raise ValueError(f"got {att} should has been int between 0 and 6")
     return unpacked
 
-def main():
-    """Fetch args from the commandline and proceed.
+def state_roll(state):
+    """A roll of (attribute, skill, gear) faces with the push state
+    <state> of exact.mutant_push_state. Locked 6s are all put in the
+    skill group, it makes no difference once pushed.
+    """
+    attr, skill, gear, successes, attr_botches, gear_botches = state
+    return ([1] * attr_botches + [2] * attr, [6] * successes + [2] * skill,
+            [1] * gear_botches + [2] * gear)
+
+
+def push_odds(attribute, skill, gear, throws=100000, exact_odds=False, result_cache=None):
+    """Return (throws, results) of pushing a roll, throws being 1 for
+    exact odds. Results are kept in MEMO by push state, a roll asked
+    again, with its dice in any order, is not computed again.
+    """
+    from yze import cache, exact
+    state = exact.mutant_push_state(attribute, skill, gear)
+    key = (state, None if exact_odds else throws, exact_odds)
+    if key not in MEMO:
+        if exact_odds:
+            MEMO[key] = (1, exact.mutant_push_results(*state_roll(state)))
+        else:
+            MEMO[key] = cache.lookup(result_cache, 'mutant_push', state, throws, None,
+                                     lambda: multiple_throws(*state_roll(state), throws=throws,
+                                                             verbose=False))
+    return MEMO[key]
+
+
+def percent_results(throws, results):
+    """Results in percent, JSON ready.
+    """
+    odds = {key: results[key] * 100 / throws for key in ODDS_KEYS}
+    for key in LIST_KEYS:
+        odds[key] = {str(k): v * 100 / throws for k, v in sorted(results[key].items())}
+    return odds
+
+
+def read_rolls(stream, fmt):
+    """Yield (line number, (attribute, skill, gear) or the error) of
+    each roll of <stream>. A JSON Lines roll is an object with
+    attribute, skill and gear faces, a TSV roll is up to three columns
+    of faces, a first line that is not made of faces is a header.
     """
+    import json
+    for number, line in enumerate(stream, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        try:
+            if fmt == 'jsonl':
+                record = json.loads(line)
+                roll = tuple(unpack(record.get(key) or '0') for key in ('attribute', 'skill', 'gear'))
+            else:
+                columns = (line.split('\t') + ['', '', ''])[:3]
+                if number == 1 and not ''.join(columns).strip().isdigit():
+                    continue
+                roll = tuple(unpack(c.strip() or '0') for c in columns)
+        except (ValueError, AttributeError) as e:
+            yield number, e
+        else:
+            yield number, roll
+
+
+def batch(stream, out, fmt='jsonl', throws=100000, exact_odds=False, result_cache=None):
+    """Write the odds of pushing every roll read from <stream> to <out>
+    in <fmt>, one line per roll as soon as it is known. JSON Lines get
+    every result, TSV the odds of at least one success, attribute
+    botch and gear botch.
+    """
+    import json
+    if fmt == 'tsv':
+        out.write('Attr\tSkill\tGear\talo p.\talo attr d.\talo gear d.\n')
+    for number, roll in read_rolls(stream, fmt):
+        if isinstance(roll, Exception):
+            if fmt == 'jsonl':
+                out.write(json.dumps({'line': number, 'error': str(roll)}) + '\n')
+            else:
+                print(f'line {number}: {roll}', file=sys.stderr)
+            continue
+        odds = percent_results(*push_odds(*roll, throws, exact_odds, result_cache))
+        if fmt == 'jsonl':
+            out.write(json.dumps({'attribute': roll[0], 'skill': roll[1], 'gear': roll[2], **odds}) + '\n')
+        else:
+            faces = [''.join(str(x) for x in group) for group in roll]
+            out.write('\t'.join(faces + [str(odds[key]) for key in ODDS_KEYS]) + '\n')
+        out.flush()
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
+    """
+    import argparse
+    from yze import cache, exact
     parser = argparse.ArgumentParser(
                         prog='mutant_odds_of_pushing',
                         description="""Once you get a result, what are your odds when pushing it?
@@ -83,16 +187,34 @@ def main():
 
     parser.add_argument('-t', '--throws', default=100000)      # option that takes a value
     parser.add_argument('-a', '--attribute_dice',
-                        help="List your dice results eg: 253",
-                        required=True)
+                        help="List your dice results eg: 253")
     parser.add_argument('-s', '--skill_dice',
-                        default=0,
+                        default='0',
                         help="List your dice results eg: 45")
     parser.add_argument('-g', '--gear_dice',
-                        default=0,
+                        default='0',
                         help="List your dice results eg: 32")
+    parser.add_argument('-e', '--exact', action='store_true',
+                        help="compute exact odds instead of throwing dice")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not read or store results in the user cache")
+    parser.add_argument('-b', '--batch', nargs='?', const='-', default=None,
+                        help="read rolls from this file, or stdin, and write their odds to stdout")
+    parser.add_argument('-f', '--format', choices=['jsonl', 'tsv'], default='jsonl',
+                        help="format of the --batch rolls and odds, jsonl by default")
+
+    args = parser.parse_args(argv)
+    if args.batch is None and args.attribute_dice is None:
+        parser.error("the following arguments are required: -a/--attribute_dice")
 
-    args = parser.parse_args()
+    if args.batch is not None:
+        result_cache = None if args.exact else cache.open_cache(not args.no_cache)
+        if args.batch == '-':
+            batch(sys.stdin, sys.stdout, args.format, int(args.throws), args.exact, result_cache)
+        else:
+            with open(args.batch) as stream:
+                batch(stream, sys.stdout, args.format, int(args.throws), args.exact, result_cache)
+        return
 
     attribute_res = unpack(args.attribute_dice)
     skill_res = unpack(args.skill_dice)
@@ -100,7 +222,15 @@ def main():
 
     throws = int(args.throws)
 
-    results = multiple_throws(attribute_res, skill_res, gear_res,throws=throws)
+    if args.exact:
+        throws = 1
+        results = exact.mutant_push_results(attribute_res, skill_res, gear_res)
+    else:
+        # Odds only depend on the counts of locked and rerolled dice
+        state = exact.mutant_push_state(attribute_res, skill_res, gear_res)
+        throws, results = cache.lookup(cache.open_cache(not args.no_cache), 'mutant_push', state,
+                                       throws, None,
+                                       lambda: multiple_throws(attribute_res, skill_res, gear_res, throws=throws))
 
     print ("Odds of having:")
     print (f"    -at least one success: {results['atleast_one_pushed'] * 100 / throws} %")
@@ -0,0 +1,133 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Streaming output of benchmark tables. Rows are written and flushed
+as soon as they are computed, as TSV, CSV or JSON Lines, so that an
+interrupted sweep can be resumed where it stopped.
+"""
+
+import csv
+import json
+import os
+import sys
+
+FORMATS = ['tsv', 'csv', 'jsonl']
+
+
+def format_cell(value, margin=None):
+    """Text of a percentage cell, empty for a missing value.
+    """
+    if value is None:
+        return ''
+    if margin is None:
+        return str(value)
+    return f'{value}±{margin:.3f}'
+
+
+class RowWriter:
+    """Write rows of <columns> to <stream> in <fmt>. A row is a list of
+    values, one per column, None for an empty cell. <margins> is an
+    optional list of confidence intervals of the same length.
+    """
+    def __init__(self, stream, columns, fmt='tsv'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Output format should be one of {', '.join(FORMATS)}. {fmt} was provided.")
+        self.stream = stream
+        self.columns = columns
+        self.fmt = fmt
+        self.csv = None
+        if fmt != 'jsonl':
+            self.csv = csv.writer(stream, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+
+    def write_header(self):
+        """Write the column names, JSON Lines have none.
+        """
+        if self.csv is not None:
+            self.csv.writerow(self.columns)
+            self.stream.flush()
+
+    def write(self, row, margins=None):
+        """Write one row and flush it.
+        """
+        if margins is None:
+            margins = [None] * len(row)
+        if self.csv is not None:
+            self.csv.writerow([format_cell(v, m) for v, m in zip(row, margins)])
+        else:
+            record = {c: v for c, v in zip(self.columns, row) if v is not None}
+            found = {c: m for c, m, v in zip(self.columns, margins, row) if m is not None and v is not None}
+            if found:
+                record['margins'] = found
+            self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+
+class ResumeError(ValueError):
+    """The file to resume was not written with the same columns or
+    format.
+    """
+
+
+def read_done(path, fmt, keys, columns=None):
+    """Return the set of tuples of the first <keys> columns already
+    written in <path>. A last line cut by an interruption is removed
+    from the file. When <columns> are given, raise ResumeError if the
+    file does not have them, in <fmt>.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+            data = data[:data.rfind(b'\n') + 1]
+    lines = data.decode().splitlines()
+    if fmt == 'jsonl':
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ResumeError(f"{path} is not a JSON Lines file.") from None
+            if not isinstance(record, dict) or \
+                    columns is not None and not set(record) <= set(columns) | {'margins'}:
+                raise ResumeError(f"The records of {path} do not have the columns of the list.")
+            done.add(tuple(record[k] for k in keys))
+    else:
+        reader = csv.reader(lines, delimiter='\t' if fmt == 'tsv' else ',')
+        header = next(reader, None)
+        if columns is not None and header is not None and header != list(columns):
+            raise ResumeError(f"The header of {path} is not the {fmt} header of the list.")
+        for row in reader:
+            done.add(tuple(int(v) for v in row[:len(keys)]))
+    return done
+
+
+def open_output(path, fmt, columns, keys, resume=False):
+    """Return (writer, done): a RowWriter on <path> (stdout when None)
+    with its header written, and the set of key tuples already in the
+    file when resuming. <keys> are the columns identifying a row.
+    Raise ResumeError when the file to resume has other columns.
+    """
+    if path is None:
+        writer = RowWriter(sys.stdout, columns, fmt)
+        writer.write_header()
+        return writer, set()
+    done = read_done(path, fmt, keys, columns) if resume else set()
+    fresh = not (resume and os.path.exists(path) and os.path.getsize(path))
+    stream = open(path, 'w' if fresh else 'a', newline='')
+    writer = RowWriter(stream, columns, fmt)
+    if fresh:
+        writer.write_header()
+    return writer, done
@@ -0,0 +1,161 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Conditional odds of a pool given its first roll. A RollTable is
+built once per pool, from the exact odds or from simulated rolls, and
+answers any number of questions without rolling again:
+
+    >>> table = pool_table(MutantDicePool(attr=3, skill=2, gear=1))
+    >>> table.probability(pushed_successes=(2, None), successes=1, attr_botches=2)
+    Fraction(247, 612)
+
+Features are the successes and botches of the first roll, named as in
+batch.spec_counts, and the same after the pushes with a pushed_
+prefix. A condition on a feature is a value, or a (low, high) range
+where either bound may be None.
+"""
+
+from yze import exact
+
+PUSHED = 'pushed_'
+
+
+def feature_names(spec):
+    """Names of the features of a pool of <spec>, first roll then after
+    the pushes.
+    """
+    names = ['successes'] + [group.botch for group in spec.groups if group.botch is not None]
+    return tuple(names + [PUSHED + name for name in names])
+
+
+def matches(value, condition):
+    if isinstance(condition, tuple):
+        low, high = condition
+        return (low is None or value >= low) and (high is None or value <= high)
+    return value == condition
+
+
+class RollTable:
+    """Weights of every outcome, a tuple of the values of <names>. They
+    are probabilities for exact tables and counts of rolls for
+    simulated ones. Every value of every feature is indexed, so the
+    outcomes matching conditions are found without going through the
+    whole table.
+    """
+    def __init__(self, names, weights):
+        self.names = tuple(names)
+        self.weights = dict(weights)
+        self.total = sum(self.weights.values())
+        self.index = {name: {} for name in self.names}
+        for outcome in self.weights:
+            for name, value in zip(self.names, outcome):
+                self.index[name].setdefault(value, set()).add(outcome)
+
+    def select(self, conditions):
+        """Set of the outcomes matching the <conditions> dict.
+        """
+        selected = None
+        for name, condition in sorted(conditions.items(), key=lambda item: len(self.index[item[0]])):
+            keys = set()
+            for value, outcomes in self.index[name].items():
+                if matches(value, condition):
+                    keys |= outcomes
+            selected = keys if selected is None else selected & keys
+            if not selected:
+                break
+        return set(self.weights) if selected is None else selected
+
+    def weight(self, **conditions):
+        return sum(self.weights[outcome] for outcome in self.select(conditions))
+
+    def given(self, **conditions):
+        """RollTable of the outcomes matching <conditions>.
+        """
+        return RollTable(self.names, {k: self.weights[k] for k in self.select(conditions)})
+
+    def probability(self, **conditions):
+        """Odds of the pushed_ <conditions> given the others, or of all
+        <conditions> when none is about pushed features. None when the
+        given conditions never happen.
+        """
+        given = {k: v for k, v in conditions.items() if not k.startswith(PUSHED)}
+        if len(given) == len(conditions):
+            given = {}
+        total = self.weight(**given)
+        if not total:
+            return None
+        return self.weight(**conditions) / total
+
+    def marginal(self, name, **conditions):
+        """{value: odds} of the feature <name> given <conditions>.
+        """
+        position = self.names.index(name)
+        selected = self.select(conditions)
+        total = sum(self.weights[outcome] for outcome in selected)
+        res = {}
+        for outcome in selected:
+            res[outcome[position]] = res.get(outcome[position], 0) + self.weights[outcome]
+        return {value: res[value] / total for value in sorted(res)}
+
+
+def exact_table(spec, sizes, pushes=1):
+    """RollTable of the exact odds of a pool of <spec> with <sizes>
+    dice per group, pushed <pushes> times.
+    """
+    return RollTable(feature_names(spec), exact.spec_joint_distribution(spec, tuple(sizes), pushes))
+
+
+def counts_table(spec, first, pushed):
+    """RollTable of simulated rolls, <first> and <pushed> being their
+    batch.spec_counts.
+    """
+    import numpy as np
+    names = feature_names(spec)
+    half = len(names) // 2
+    columns = [first[name] for name in names[:half]] + [pushed[name] for name in names[:half]]
+    outcomes, counts = np.unique(np.stack(columns, axis=1), axis=0, return_counts=True)
+    return RollTable(names, {tuple(int(x) for x in outcome): int(count)
+                             for outcome, count in zip(outcomes, counts)})
+
+
+def simulated_table(spec, sizes, throws, pushes=1, rng=None):
+    """RollTable of <throws> rolls of a pool of <spec> with <sizes>
+    dice per group, pushed <pushes> times by the batch engine.
+    """
+    from yze import batch
+    rng = batch.make_rng(rng)
+    faces = batch.spec_throw(spec, sizes, throws, rng)
+    first = batch.spec_counts(spec, sizes, faces)
+    for push in range(pushes):
+        faces = batch.spec_push(spec, sizes, faces, rng)
+    return counts_table(spec, first, batch.spec_counts(spec, sizes, faces))
+
+
+def log_table(log, pushes=None):
+    """RollTable of the rolls of a rolllog.RollLog, after <pushes>
+    pushes, all of them by default.
+    """
+    pushes = log.pushes if pushes is None else pushes
+    return counts_table(log.spec, log.counts(0), log.counts(pushes))
+
+
+def pool_table(pool, pushes=1, throws=None, rng=None):
+    """RollTable of a MutantDicePool, FBLDicePool, artefact die
+    included, or AlienDicePool. Exact unless a number of <throws> is
+    given.
+    """
+    spec, sizes = pool.pool_spec()
+    if throws is None:
+        return exact_table(spec, sizes, pushes)
+    return simulated_table(spec, sizes, throws, pushes, pool.batch_rng(rng))
@@ -0,0 +1,185 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Binary log of the raw faces of simulated rolls, to slice big runs
+again later without keeping them in memory.
+
+A log starts with MAGIC, the length of its JSON header as a
+little-endian uint32 and the header, padded so that faces start on an
+ALIGN boundary. The header holds the PoolSpec, the size, successes
+table and number of the dice of each group, and the number of pushes. Then comes one fixed width record per roll,
+one uint8 per face: the faces of the throw, then those of each push.
+The number of rolls is given by the size of the file, a record cut
+short by an interrupted run is ignored.
+
+RollLog maps the file and gives NumPy views of it, nothing is copied
+or read before it is used:
+
+    >>> write_log('mutant.log', MutantDicePool(3, 2, 1), 10**8, pushes=1)
+    >>> log = RollLog('mutant.log')
+    >>> log.group('attr', level=1)[:5]
+    >>> log.counts(level=1)['successes'].mean()
+
+This module needs NumPy, install yze with the numpy extra.
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from yze import batch
+from yze.dice import DieGroup, PoolSpec
+
+MAGIC = b'YZELOG1\n'
+ALIGN = 64
+CHUNK = 1 << 16
+
+
+def level_widths(spec, sizes, pushes):
+    """Number of faces of the throw and of each push.
+    """
+    return [sum(sizes) + level * len(spec.added) for level in range(pushes + 1)]
+
+
+def header_bytes(spec, sizes, pushes):
+    """MAGIC, length and JSON header, padded to ALIGN.
+    """
+    header = json.dumps({
+        'groups': [{'name': group.name, 'locked': list(group.locked), 'botch': group.botch,
+                    'size': group.size,
+                    'successes': None if group.successes is None else list(group.successes),
+                    'dice': size} for group, size in zip(spec.groups, sizes)],
+        'added': list(spec.added),
+        'pushes': pushes,
+    }).encode()
+    head = MAGIC + struct.pack('<I', len(header)) + header
+    return head + b' ' * (-len(head) % ALIGN)
+
+
+class LogWriter:
+    """Append rolls of a pool of the PoolSpec <spec> with <sizes> dice
+    to the log at <path>, created or truncated. Use it as a context
+    manager, or close it.
+    """
+    def __init__(self, path, spec, sizes, pushes=0):
+        self.spec = spec
+        self.sizes = tuple(sizes)
+        self.widths = level_widths(spec, self.sizes, pushes)
+        self.stream = open(path, 'wb')
+        self.stream.write(header_bytes(spec, self.sizes, pushes))
+
+    def write(self, levels):
+        """Append rolls given as one (n, dice) array of faces per level,
+        the throw then each push.
+        """
+        if [faces.shape[1] for faces in levels] != self.widths:
+            raise ValueError(f'expected levels of {self.widths} faces')
+        np.hstack(levels).astype(np.uint8, copy=False).tofile(self.stream)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_log(path, pool, n, pushes=0, rng=None, chunk=CHUNK):
+    """Throw <pool>, a MutantDicePool, FBLDicePool or AlienDicePool,
+    <n> times and push each roll <pushes> times with its batch methods,
+    logging every face at <path>, the artefact die of an FBLDicePool
+    being a group of its own. Rolls are made <chunk> at a time so that
+    memory use does not grow with <n>.
+    """
+    rng = batch.make_rng(rng)
+    with LogWriter(path, *pool.pool_spec(), pushes) as writer:
+        for start in range(0, n, chunk):
+            faces = pool.throw_many(min(chunk, n - start), rng)
+            levels = [faces]
+            for push in range(pushes):
+                faces = pool.push_many(faces, rng)
+                levels.append(faces)
+            writer.write(levels)
+
+
+class RollLog:
+    """Read only view of the log at <path>. faces is a (rolls, record)
+    uint8 array mapped on the file.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as stream:
+            self.map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f'{path} is not a yze roll log')
+        length, = struct.unpack_from('<I', self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self.map[start:start + length])
+        self.spec = PoolSpec(tuple(DieGroup(g['name'], tuple(g['locked']), g['botch'], g.get('size', 6),
+                                            tuple(g['successes']) if g.get('successes') else None)
+                                   for g in header['groups']), tuple(header['added']))
+        self.sizes = tuple(g['dice'] for g in header['groups'])
+        self.pushes = header['pushes']
+        self.widths = level_widths(self.spec, self.sizes, self.pushes)
+        offset = start + length + (-(start + length) % ALIGN)
+        record = sum(self.widths)
+        rolls = (len(self.map) - offset) // record
+        self.faces = np.frombuffer(self.map, dtype=np.uint8, count=rolls * record,
+                                   offset=offset).reshape(rolls, record)
+
+    def __len__(self):
+        return self.faces.shape[0]
+
+    def level(self, level=0):
+        """(rolls, dice) view of the faces of the throw, level 0, or of
+        a push.
+        """
+        start = sum(self.widths[:level])
+        return self.faces[:, start:start + self.widths[level]]
+
+    def group(self, name, level=0):
+        """(rolls, dice) view of the faces of the group <name>.
+        """
+        faces = self.level(level)
+        for group, columns in batch.spec_slices(self.spec, self.sizes, faces.shape[1]):
+            if group.name == name:
+                return faces[:, columns]
+        raise KeyError(name)
+
+    def counts(self, level=0, rows=slice(None)):
+        """Successes and botches of the <rows> of a level, see
+        batch.spec_counts.
+        """
+        return batch.spec_counts(self.spec, self.sizes, self.level(level)[rows])
+
+    def close(self):
+        """Unmap the file. Views still in use keep it mapped until they
+        are released.
+        """
+        self.faces = None
+        try:
+            self.map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Roll service: dice pools over HTTP with JSON bodies, served by one
+asyncio event loop, without a thread per connection.
+
+    POST   /pools             {"type": "mutant", "attr": 3, ...}  throw a new pool
+    GET    /pools/<id>        last results of a pool
+    POST   /pools/<id>/push   push it, {"even_one_success": true} for Blade Runner
+    POST   /pools/<id>/multipush
+    DELETE /pools/<id>
+    POST   /batch             {"requests": [{"op": "throw", ...}, {"op": "push", "id": ...}]}
+    GET    /feed              every roll as Server-Sent Events
+    GET    /stats             yze.stats counts, when started with --stats
+
+Pools are kept in memory and forgotten when unused for a while.
+"""
+
+from yze.dice import (AlienDicePool, BladeRunnerDicePool, BufferedSource, FBLDicePool,
+                      MutantDicePool, Twilight2000DicePool)
+from yze import stats
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from collections import OrderedDict
+
+POOL_TYPES = {
+    'mutant': (MutantDicePool, ('attr', 'skill', 'gear')),
+    'fbl': (FBLDicePool, ('attr', 'skill', 'gear', 'artefact')),
+    'alien': (AlienDicePool, ('pool', 'stress')),
+    't2k': (Twilight2000DicePool, ('attr', 'skill', 'ammo')),
+    'blade_runner': (BladeRunnerDicePool, ('attr', 'skill', 'advantage')),
+}
+MAX_DICE = 100
+DEFAULT_TTL = 3600
+FEED_QUEUE = 256
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large'}
+MAX_BODY = 1024 * 1024
+
+
+class RollError(Exception):
+    """A request that cannot be served, with its HTTP <status>.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionStore:
+    """Pools by id. A pool unused for <ttl> seconds is evicted, <clock>
+    gives the current time in seconds.
+    """
+    def __init__(self, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.pools = OrderedDict()
+
+    def add(self, pool):
+        """Store <pool> and return its new id.
+        """
+        self.evict()
+        key = secrets.token_urlsafe(9)
+        self.pools[key] = (pool, self.clock() + self.ttl)
+        return key
+
+    def get(self, key):
+        """Return the pool of <key> and keep it alive for another ttl.
+        """
+        self.evict()
+        if key not in self.pools:
+            raise RollError(f"No pool {key}, it may have expired.", 404)
+        pool = self.pools.pop(key)[0]
+        self.pools[key] = (pool, self.clock() + self.ttl)
+        return pool
+
+    def remove(self, key):
+        """Forget the pool of <key>.
+        """
+        if self.pools.pop(key, None) is None:
+            raise RollError(f"No pool {key}, it may have expired.", 404)
+
+    def evict(self):
+        """Forget the expired pools. They are kept in order of use, so
+        only the oldest ones are looked at.
+        """
+        now = self.clock()
+        while self.pools:
+            key, (pool, expires) = next(iter(self.pools.items()))
+            if expires > now:
+                break
+            del self.pools[key]
+
+    def __len__(self):
+        return len(self.pools)
+
+
+class RollFeed:
+    """Fan out roll events to every subscriber queue. A subscriber too
+    slow to keep up loses events rather than slowing the rolls down.
+    """
+    def __init__(self):
+        self.queues = set()
+
+    def subscribe(self):
+        """Return a new asyncio.Queue of events.
+        """
+        queue = asyncio.Queue(FEED_QUEUE)
+        self.queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.queues.discard(queue)
+
+    def publish(self, event):
+        for queue in self.queues:
+            if not queue.full():
+                queue.put_nowait(event)
+
+
+def pool_args(pool_type, request):
+    """Constructor arguments of <pool_type> found in the <request> dict,
+    checked so that a request cannot ask for a huge pool.
+    """
+    names = POOL_TYPES[pool_type][1]
+    unknown = set(request) - set(names) - {'op', 'type'}
+    if unknown:
+        raise RollError(f"Unknown arguments for {pool_type}: {', '.join(sorted(unknown))}.")
+    args = {name: request[name] for name in names if request.get(name) is not None}
+    total = 0
+    for name, value in args.items():
+        if name in ('attr', 'skill') and pool_type in ('t2k', 'blade_runner'):
+            if value not in ('A', 'B', 'C', 'D'):
+                raise RollError(f"{name} should be A, B, C or D. {value} was provided.")
+        elif name == 'advantage':
+            if not isinstance(value, bool):
+                raise RollError(f"advantage should be true or false. {value} was provided.")
+        elif name == 'artefact':
+            if type(value) is not int or value not in (6, 8, 10, 12):
+                raise RollError(f"Artefact dice size should be 6, 8, 10 or 12. {value} was provided.")
+        else:
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise RollError(f"{name} should be a positive number. {value} was provided.")
+            total += value
+    if total > MAX_DICE:
+        raise RollError(f"A pool has at most {MAX_DICE} dice.")
+    return args
+
+
+def result_dict(result):
+    """JSON ready dict of a DiceResult, faces as lists and step or
+    artefact dice as [face, successes].
+    """
+    return {key: list(value) if isinstance(value, (list, tuple)) else value
+            for key, value in result.items()}
+
+
+class RollService:
+    """Throw, push and multipush pools kept in a SessionStore, publish
+    every roll to a RollFeed. Dice come from one BufferedSource for the
+    whole service unless <rng> is given.
+    """
+    def __init__(self, ttl=DEFAULT_TTL, rng=None, clock=time.monotonic):
+        self.store = SessionStore(ttl, clock)
+        self.feed = RollFeed()
+        self.source = BufferedSource() if rng is None else rng
+
+    def roll(self, request):
+        """Serve one request dict: {"op": "throw", "type": ...} with the
+        pool arguments, or {"op": "push" or "multipush" or "get" or
+        "delete", "id": ...}. Returns the response dict.
+        """
+        if not isinstance(request, dict):
+            raise RollError("A request should be a JSON object.")
+        op = request.get('op', 'throw')
+        if op == 'throw':
+            pool_type = request.get('type')
+            if not isinstance(pool_type, str) or pool_type not in POOL_TYPES:
+                raise RollError(f"Pool type should be one of {', '.join(POOL_TYPES)}. {pool_type} was provided.")
+            pool = POOL_TYPES[pool_type][0](**pool_args(pool_type, request), rng=self.source)
+            response = {'id': self.store.add(pool), 'type': pool_type, 'result': result_dict(pool.throw())}
+        elif op == 'stats':
+            return {'enabled': stats.enabled(), **stats.snapshot()}
+        elif op in ('push', 'multipush', 'get', 'delete'):
+            key = request.get('id')
+            if not isinstance(key, str):
+                raise RollError("id should be a string.")
+            if op == 'delete':
+                self.store.remove(key)
+                return {'id': key, 'deleted': True}
+            pool = self.store.get(key)
+            pool_type = next(name for name, (cls, args) in POOL_TYPES.items() if isinstance(pool, cls))
+            if op == 'get':
+                result = pool.multipushed_res if getattr(pool, 'multipushed', False) else \
+                    pool.pushed_res if pool.pushed else pool.result
+            elif op == 'multipush':
+                if not hasattr(pool, 'multipush'):
+                    raise RollError(f"A {pool_type} pool cannot be multipushed.")
+                result = pool.multipush()
+            elif request.get('even_one_success'):
+                if pool_type != 'blade_runner':
+                    raise RollError("Only Blade Runner pools push even one success.")
+                result = pool.push(even_one_success=True)
+            else:
+                result = pool.push()
+            response = {'id': key, 'type': pool_type, 'result': result_dict(result)}
+        else:
+            raise RollError(f"Unknown operation {op}.")
+        if op in ('throw', 'push', 'multipush'):
+            self.feed.publish({'op': op, **response})
+        return response
+
+    def batch(self, requests):
+        """Serve a list of request dicts, in order. A failed request
+        gets an {"error": ...} response, the others are still served.
+        """
+        if not isinstance(requests, list):
+            raise RollError("requests should be a JSON list.")
+        responses = []
+        for request in requests:
+            try:
+                responses.append(self.roll(request))
+            except RollError as e:
+                responses.append({'error': str(e), 'status': e.status})
+        return responses
+
+
+def route(method, path, body):
+    """Return the request dict of the roll or batch operation of an HTTP
+    <method> on <path> with a JSON <body>, raise RollError otherwise.
+    """
+    parts = [p for p in path.split('?')[0].split('/') if p]
+    if parts == ['pools'] and method == 'POST':
+        return {**body, 'op': 'throw'}
+    if parts == ['stats'] and method == 'GET':
+        return {'op': 'stats'}
+    if parts == ['batch'] and method == 'POST':
+        return {'op': 'batch', 'requests': body.get('requests')}
+    if len(parts) == 2 and parts[0] == 'pools':
+        if method == 'GET':
+            return {'op': 'get', 'id': parts[1]}
+        if method == 'DELETE':
+            return {'op': 'delete', 'id': parts[1]}
+    if len(parts) == 3 and parts[0] == 'pools' and parts[2] in ('push', 'multipush'):
+        if method == 'POST':
+            return {**body, 'op': parts[2], 'id': parts[1]}
+    if parts and parts[0] in ('pools', 'batch', 'feed', 'stats'):
+        raise RollError(f"{method} is not allowed on {path}.", 405)
+    raise RollError(f"Nothing at {path}.", 404)
+
+
+async def read_request(reader):
+    """Read one HTTP request. Returns (method, path, headers, body) or
+    None when the client closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode('latin-1').split()
+    except ValueError:
+        raise RollError("Bad request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RollError("Bad Content-Length.")
+    if length < 0:
+        raise RollError("Bad Content-Length.")
+    if length > MAX_BODY:
+        raise RollError("Request body is too big.", 413)
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def response_bytes(status, payload, keep_alive=True):
+    """HTTP response of a JSON <payload>.
+    """
+    data = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + data
+
+
+class RollServer:
+    """HTTP front of a RollService on asyncio streams. Connections are
+    kept alive, /feed streams Server-Sent Events until the client
+    leaves.
+    """
+    def __init__(self, service=None, sweep=60):
+        self.service = RollService() if service is None else service
+        self.sweep = sweep
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RollError as e:
+                    writer.write(response_bytes(e.status, {'error': str(e)}, False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if path.split('?')[0].rstrip('/') == '/feed' and method == 'GET':
+                    await self.stream_feed(writer)
+                    break
+                writer.write(self.respond(method, path, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, method, path, body, keep_alive=True):
+        """HTTP response bytes of a request other than /feed.
+        """
+        try:
+            try:
+                payload = json.loads(body) if body else {}
+            except ValueError:
+                raise RollError("Body should be JSON.")
+            if not isinstance(payload, dict):
+                raise RollError("Body should be a JSON object.")
+            request = route(method, path, payload)
+            if request['op'] == 'batch':
+                return response_bytes(200, {'responses': self.service.batch(request['requests'])},
+                                      keep_alive)
+            status = 201 if request['op'] == 'throw' else 200
+            return response_bytes(status, self.service.roll(request), keep_alive)
+        except RollError as e:
+            return response_bytes(e.status, {'error': str(e)}, keep_alive)
+
+    async def stream_feed(self, writer):
+        """Write every roll event to <writer> until it is closed.
+        """
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        queue = self.service.feed.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                writer.write(f"data: {json.dumps(event)}\n\n".encode())
+                await writer.drain()
+        finally:
+            self.service.feed.unsubscribe(queue)
+
+    async def evict_forever(self):
+        """Sweep expired pools every <sweep> seconds, so that memory is
+        given back even when nobody asks for a pool.
+        """
+        while True:
+            await asyncio.sleep(self.sweep)
+            self.service.store.evict()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start listening, return the asyncio.Server.
+        """
+        self.sweeper = asyncio.ensure_future(self.evict_forever())
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve_forever(self, host='127.0.0.1', port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    """Fetch args from the commandline, or <argv>, and proceed.
+    """
+    parser = argparse.ArgumentParser(
+                        prog='yze_server',
+                        description='serve YZE dice pools over HTTP',
+                        epilog='')
+
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL,
+                        help="seconds an unused pool is kept, 3600 by default")
+    parser.add_argument('--stats', action='store_true',
+                        help="count dice, rolls and their latency, served on /stats")
+
+    args = parser.parse_args(argv)
+    if args.stats:
+        stats.enable()
+    try:
+        asyncio.run(RollServer(RollService(ttl=args.ttl)).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
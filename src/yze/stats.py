@@ -0,0 +1,192 @@
+# Copyright (c) Nicolas Legrand <nicolas.legrand@gmail.com>
+#
+# Permission to use, copy, modify, and distribute this software for any
+# purpose with or without fee is hereby granted, provided that the above
+# copyright notice and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES
+# WITH REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR
+# ANY SPECIAL, DIRECT, INDIRECT, OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES
+# WHATSOEVER RESULTING FROM LOSS OF USE, DATA OR PROFITS, WHETHER IN AN
+# ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS ACTION, ARISING OUT OF
+# OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS SOFTWARE.
+
+"""Opt-in instrumentation of yze.dice: dice drawn per size, calls and
+latency histograms of throw, push and multipush per pool class.
+
+    from yze import stats
+    stats.enable(hook=print)
+    ...
+    stats.snapshot()
+    stats.disable()
+
+enable() wraps the methods of the dice classes and disable() puts the
+originals back, so nothing is counted and nothing is slower while
+instrumentation is off. Dice are counted where they are drawn from a
+source (face and faces of the sources of yze.dice, and throw_faces
+of the NumPy batch engine), whatever object asked for them.
+"""
+
+import bisect
+import time
+
+from yze import dice
+
+POOL_CLASSES = (dice.MutantDicePool, dice.FBLDicePool, dice.AlienDicePool,
+                dice.Twilight2000DicePool, dice.BladeRunnerDicePool)
+POOL_METHODS = ('throw', 'push', 'multipush')
+SOURCE_CLASSES = (dice.RandomSource, dice.NumpySource, dice.BufferedSource, dice.FaceStream)
+# upper bounds of the latency buckets, in seconds, the last bucket
+# holds anything slower
+BUCKETS = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 1e-2, 1e-1)
+
+ORIGINALS = {}
+HOOKS = []
+DICE = {}
+CALLS = {}
+LATENCY = {}
+
+
+def count_dice(size, n=1):
+    DICE[size] = DICE.get(size, 0) + n
+
+
+def record(cls_name, method, seconds):
+    """Count a call of <method> of <cls_name> lasting <seconds> and
+    tell the hooks.
+    """
+    key = (cls_name, method)
+    CALLS[key] = CALLS.get(key, 0) + 1
+    hist = LATENCY.get(key)
+    if hist is None:
+        hist = LATENCY[key] = [0] * (len(BUCKETS) + 1)
+    hist[bisect.bisect_left(BUCKETS, seconds)] += 1
+    for hook in HOOKS:
+        hook({'pool': cls_name, 'method': method, 'seconds': seconds})
+
+
+def timed(cls_name, method, func):
+    """<func> recording its calls and latency.
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(cls_name, method, time.perf_counter() - start)
+    wrapper.__wrapped__ = func
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+def counted_face(func):
+    def face(self, size=None):
+        res = func(self, size) if size is not None else func(self)
+        count_dice(size or self.size)
+        return res
+    face.__wrapped__ = func
+    face.__doc__ = func.__doc__
+    return face
+
+
+def counted_faces(func):
+    def faces(self, n):
+        count_dice(self.size, n)
+        return func(self, n)
+    faces.__wrapped__ = func
+    faces.__doc__ = func.__doc__
+    return faces
+
+
+def counted_throw_faces(func):
+    def throw_faces(n, dice, rng=None):
+        count_dice(6, n * dice)
+        return func(n, dice, rng)
+    throw_faces.__wrapped__ = func
+    throw_faces.__doc__ = func.__doc__
+    return throw_faces
+
+
+# original of a method a class inherited, removed again on disable
+INHERITED = object()
+
+
+def patch(owner, name, wrapper):
+    if isinstance(owner, type) and name not in vars(owner):
+        ORIGINALS[(owner, name)] = INHERITED
+    else:
+        ORIGINALS[(owner, name)] = getattr(owner, name)
+    setattr(owner, name, wrapper)
+
+
+def enable(hook=None):
+    """Start counting. <hook>, if given, is called with a dict for each
+    throw, push or multipush: pool class name, method and seconds.
+    """
+    if hook is not None:
+        add_hook(hook)
+    if ORIGINALS:
+        return
+    for cls in POOL_CLASSES:
+        for method in POOL_METHODS:
+            if hasattr(cls, method):
+                patch(cls, method, timed(cls.__name__, method, getattr(cls, method)))
+    for cls in SOURCE_CLASSES:
+        patch(cls, 'face', counted_face(cls.__dict__['face']))
+    patch(dice, 'DIRECT_SOURCES', ())
+    patch(dice.FaceStream, 'faces', counted_faces(dice.FaceStream.__dict__['faces']))
+    try:
+        from yze import batch
+    except ImportError:
+        return
+    patch(batch, 'throw_faces', counted_throw_faces(batch.throw_faces))
+
+
+def disable():
+    """Stop counting, the original methods are back. Counts are kept
+    until reset().
+    """
+    for (owner, name), original in ORIGINALS.items():
+        if original is INHERITED:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+    ORIGINALS.clear()
+    HOOKS.clear()
+
+
+def enabled():
+    return bool(ORIGINALS)
+
+
+def add_hook(hook):
+    if hook not in HOOKS:
+        HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+
+
+def reset():
+    """Forget every count.
+    """
+    DICE.clear()
+    CALLS.clear()
+    LATENCY.clear()
+
+
+def snapshot():
+    """Return a copy of the counts: 'dice' by die size, 'calls' and
+    'latency' by pool class name then method. A latency histogram maps
+    the upper bound of each bucket in seconds, None for the last one,
+    to a number of calls.
+    """
+    calls = {}
+    latency = {}
+    for (cls_name, method), n in CALLS.items():
+        calls.setdefault(cls_name, {})[method] = n
+        latency.setdefault(cls_name, {})[method] = dict(zip(BUCKETS + (None,), LATENCY[(cls_name, method)]))
+    return {'dice': dict(DICE), 'calls': calls, 'latency': latency}
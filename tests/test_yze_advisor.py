@@ -0,0 +1,54 @@
+import random
+import unittest
+
+import yze.advisor
+import yze.exact
+from yze.advisor import Weights, advise
+from yze.dice import FBLDicePool, MutantDicePool
+
+
+class TestYZEAdvisor(unittest.TestCase):
+    def test_matches_exact_odds(self):
+        """With linear weights, pushing is worth the expected successes
+        minus the expected damage of the exact push odds
+        """
+        weights = Weights(success=1.0, attr_damage=0.5, gear_damage=0.25)
+        for roll in [([2, 5, 3], [4, 5], [3, 2]), ([6, 1], [6], [1, 4]), ([1, 1, 1], [], [])]:
+            dist = yze.exact.mutant_push_odds(*yze.exact.mutant_push_state(*roll))
+            expected = sum(p * (k[0] - 0.5 * k[1] - 0.25 * k[2]) for k, p in dist.items())
+            advice = advise(*roll, weights=weights)
+            self.assertAlmostEqual(advice['push'], float(expected))
+            self.assertEqual(advice['stand'], len([x for group in roll for x in group if x == 6]))
+
+    def test_target(self):
+        """With a target, only reaching it has a value
+        """
+        weights = Weights(target=1, attr_damage=0, gear_damage=0)
+        advice = advise([2], [3], [], weights=weights)
+        self.assertAlmostEqual(advice['push'], 11 / 36)
+        self.assertEqual(advise([6], [3], [], weights=weights)['recommendation'], 'stand')
+        self.assertEqual(advise([1, 1, 1, 2], [], [], weights=Weights())['recommendation'], 'stand')
+
+    def test_artefact(self):
+        """A failed artefact die is rerolled, a successful one is locked
+        """
+        weights = Weights(attr_damage=0, gear_damage=0)
+        self.assertAlmostEqual(advise([2], [], [], (8, 3), weights)['gain'], 1 / 6 + 4 / 8)
+        self.assertEqual(advise([2], [], [], (12, 12), weights)['stand'], 4)
+
+    def test_table_lookup(self):
+        """States out of the table are computed alike
+        """
+        small = yze.advisor.PolicyTable(max_dice=2, max_successes=2)
+        full = yze.advisor.policy_table()
+        self.assertAlmostEqual(small.gain(5, 10, 8), full.gain(5, 10, 8))
+
+    def test_advise_pool(self):
+        """Thrown pools can be given as they are
+        """
+        pool = FBLDicePool(attr=3, skill=2, artefact=10, rng=random.Random(4))
+        pool.throw()
+        self.assertIn(yze.advisor.advise_pool(pool)['recommendation'], ('push', 'stand'))
+        pool = MutantDicePool(attr=2, skill=1, gear=1, rng=random.Random(4))
+        res = pool.throw()
+        self.assertEqual(yze.advisor.advise_pool(pool), advise(res['attr'], res['skill'], res['gear']))
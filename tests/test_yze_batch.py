@@ -0,0 +1,74 @@
+import unittest
+
+import yze.dice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestYZEBatch(unittest.TestCase):
+    def test_throw_many_shape(self):
+        """throw_many returns one row per roll and one column per die
+        """
+        mdp = yze.dice.MutantDicePool(attr=3, skill=2, gear=1)
+        faces = mdp.throw_many(1000, np.random.default_rng(1))
+        self.assertEqual(faces.shape, (1000, 6))
+        self.assertTrue(((faces >= 1) & (faces <= 6)).all())
+
+    def test_push_many_keeps_locked_dice(self):
+        """Pushing keeps 1 and 6 on attribute and gear, 6 on skill
+        """
+        mdp = yze.dice.MutantDicePool(attr=1, skill=1, gear=1)
+        faces = np.array([[1, 1, 6], [6, 6, 1], [3, 3, 3]], dtype=np.uint8)
+        pushed = mdp.push_many(faces, np.random.default_rng(1))
+        self.assertEqual(pushed[0, 0], 1)
+        self.assertEqual(pushed[0, 2], 6)
+        self.assertEqual(list(pushed[1]), [6, 6, 1])
+
+    def test_count_many(self):
+        """Successes are 6 anywhere, botches are 1 on attribute or gear
+        """
+        mdp = yze.dice.MutantDicePool(attr=2, skill=1, gear=1)
+        faces = np.array([[1, 6, 1, 1], [6, 6, 6, 2]], dtype=np.uint8)
+        counts = mdp.count_many(faces)
+        self.assertEqual(list(counts['successes']), [1, 3])
+        self.assertEqual(list(counts['attr_botches']), [1, 0])
+        self.assertEqual(list(counts['gear_botches']), [1, 0])
+
+    def test_spec_push_adds_dice(self):
+        """Each Alien push rerolls all but 6s and adds a stress die
+        """
+        adp = yze.dice.AlienDicePool(pool=2, stress=1)
+        faces = np.array([[6, 1, 1], [2, 6, 6]], dtype=np.uint8)
+        pushed = adp.push_many(faces, np.random.default_rng(1))
+        self.assertEqual(pushed.shape, (2, 4))
+        self.assertEqual(pushed[0, 0], 6)
+        self.assertEqual(list(pushed[1, 1:3]), [6, 6])
+        pushed = adp.push_many(pushed, np.random.default_rng(2))
+        counts = adp.count_many(pushed)
+        self.assertEqual(pushed.shape, (2, 5))
+        self.assertEqual(list(counts['stress_ones']), list(np.count_nonzero(pushed[:, 2:] == 1, axis=1)))
+
+    def test_artefact_column(self):
+        """The artefact die is the last column, kept when it got
+        successes and counted with the others
+        """
+        fbl = yze.dice.FBLDicePool(attr=1, skill=1, artefact=12)
+        spec, sizes = fbl.pool_spec()
+        self.assertEqual((spec.groups[-1].locked, sizes), (tuple(range(6, 13)), (1, 1, 0, 1)))
+        self.assertEqual(fbl.throw_many(10, np.random.default_rng(1)).shape, (10, 3))
+        faces = np.array([[6, 2, 12], [3, 6, 5]], dtype=np.uint8)
+        self.assertEqual(list(fbl.count_many(faces)['successes']), [5, 1])
+        pushed = fbl.push_many(faces, np.random.default_rng(1))
+        self.assertEqual(list(pushed[0, ::2]), [6, 12])
+        self.assertEqual(pushed[1, 1], 6)
+        pushed = fbl.count_many(fbl.push_many(fbl.throw_many(100000, np.random.default_rng(1))))
+        odds = sum(p for outcome, p in fbl.distribution(pushes=1).items() if outcome[0])
+        self.assertAlmostEqual((pushed['successes'] > 0).mean(), float(odds), places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
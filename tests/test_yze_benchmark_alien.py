@@ -0,0 +1,47 @@
+import unittest
+from fractions import Fraction
+
+import yze.benchmark_alien
+import yze.exact
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestBenchmarkAlien(unittest.TestCase):
+    def test_exact_panic(self):
+        """Panic is any stress die showing 1, each push adds one
+        """
+        first = yze.exact.alien_distribution(pool=2, stress=1, pushes=0)
+        self.assertEqual(yze.exact.marginal(first, 1)[1], Fraction(1, 6))
+        self.assertEqual(sum(first.values()), 1)
+        levels = yze.exact.alien_results(pool=1, stress=0, pushes=2)
+        self.assertEqual(levels[0]['panic'], 0)
+        self.assertAlmostEqual(levels[1]['panic'], 1 / 6)
+        self.assertAlmostEqual(levels[1]['atleast_one'], 1 - (5 / 6) ** 3)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_simulation_close_to_exact(self):
+        """The vectorized simulation agrees with the exact odds
+        """
+        throws = 50000
+        simulated = yze.benchmark_alien.multiple_throws(throws, 3, 2, 3, rng=1)
+        computed = yze.exact.alien_results(3, 2, 3)
+        self.assertEqual(len(simulated), 4)
+        for sim, comp in zip(simulated, computed):
+            self.assertAlmostEqual(sim['atleast_one'] / throws, comp['atleast_one'], delta=0.01)
+            self.assertAlmostEqual(sim['panic'] / throws, comp['panic'], delta=0.01)
+
+    def test_python_fallback(self):
+        """Without NumPy the pool can be pushed twice at most
+        """
+        levels = yze.benchmark_alien.multiple_throws_python(100, 2, 1, 2)
+        self.assertEqual(len(levels), 3)
+        with self.assertRaises(ValueError):
+            yze.benchmark_alien.multiple_throws_python(100, 2, 1, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+import yze.benchmark_mutant
+import yze.exact
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestBenchmarkMutant(unittest.TestCase):
+    def test_complete_configs_order(self):
+        """The complete list goes through attribute, skill then gear
+        """
+        configs = yze.benchmark_mutant.complete_configs()
+        self.assertEqual(len(configs), 90)
+        self.assertEqual(configs[:4], [(1, 0, 0), (1, 0, 1), (1, 0, 2), (1, 1, 0)])
+
+    def test_configurable_ranges(self):
+        """Ranges of the command line and columns sized to the pools
+        """
+        parse = yze.benchmark_mutant.parse_range
+        self.assertEqual(parse('0-5'), range(0, 6))
+        self.assertEqual(parse('4'), range(4, 5))
+        for bad in ('x', '5-2', '-1'):
+            with self.assertRaises(Exception):
+                parse(bad)
+        configs = yze.benchmark_mutant.complete_configs(range(2, 3), range(6, 8), range(0, 5))
+        self.assertEqual(len(configs), 10)
+        sizes = yze.benchmark_mutant.count_sizes(configs)
+        self.assertEqual(sizes, (13, 13, 2, 4))
+        columns = yze.benchmark_mutant.complete_columns(sizes)
+        self.assertEqual(columns[-1], '4 gear d.')
+        self.assertEqual(len(columns), 7 + 13 + 13 + 2 + 4)
+        row, margins = yze.benchmark_mutant.complete_row(
+            2, 7, 4, None, yze.exact.mutant_results(2, 7, 4), sizes)
+        self.assertEqual(len(row), len(columns))
+        self.assertIsNone(margins)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_jobs_are_reproducible(self):
+        """Same seed, same results, whatever the number of jobs
+        """
+        serial = list(yze.benchmark_mutant.complete_benchmark(200, seed=7))
+        parallel = list(yze.benchmark_mutant.complete_benchmark(200, jobs=2, seed=7))
+        self.assertEqual(serial, parallel)
+
+    def test_bounded_map(self):
+        """Jobs are submitted as results are taken, in order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        submitted = []
+
+        def job(n):
+            submitted.append(n)
+            return n * 2
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = yze.benchmark_mutant.bounded_map(executor, job, range(100), 4)
+            self.assertEqual([next(results) for i in range(3)], [0, 2, 4])
+            results.close()
+        self.assertLessEqual(len(submitted), 7)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(list(yze.benchmark_mutant.bounded_map(executor, job, range(10), 3)),
+                             list(range(0, 20, 2)))
+
+    def test_margin(self):
+        """Margins shrink with throws and never vanish
+        """
+        self.assertAlmostEqual(yze.benchmark_mutant.margin(5000, 10000, 1.96), 0.98, places=2)
+        self.assertLess(yze.benchmark_mutant.margin(50000, 100000, 1.96),
+                        yze.benchmark_mutant.margin(5000, 10000, 1.96))
+        self.assertGreater(yze.benchmark_mutant.margin(0, 10000, 1.96), 0)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_adaptive_throws(self):
+        """Adaptive throws stop once the precision is reached
+        """
+        res = yze.benchmark_mutant.adaptive_throws(1, 0, 0, precision=1, batch=1000, rng=3)
+        self.assertLess(res['throws'], 10000)
+        widest = max(res['margins'][key] for key in yze.benchmark_mutant.COUNT_KEYS)
+        self.assertLessEqual(widest, 1)
+        capped = yze.benchmark_mutant.adaptive_throws(5, 5, 2, precision=0.01, batch=1000,
+                                                      max_throws=3000, rng=3)
+        self.assertEqual(capped['throws'], 3000)
+        self.assertEqual(sum(capped['successes'].values()), capped['atleast_one'])
+        small = yze.benchmark_mutant.adaptive_throws(1, 0, 0, precision=0.1, batch=1000,
+                                                     max_throws=1500, rng=3)
+        self.assertEqual(small['throws'], 1500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import yze.cache
+
+
+class TestYZECache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'results.sqlite')
+        self.cache = yze.cache.ResultCache(self.path)
+
+    def tearDown(self):
+        self.cache.db.close()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Results come back with their int keys
+        """
+        results = {'atleast_one': 10, 'successes': {1: 7, 2: 3}}
+        self.cache.put('mutant', (2, 1, 0), 100, results)
+        self.assertEqual(self.cache.get('mutant', (2, 1, 0), 100), (100, results))
+        self.assertIsNone(self.cache.get('mutant', (2, 1, 1), 100))
+        self.cache.put('mutant', (2, 1, 0), None, {'successes': {1: 0.5}})
+        self.assertEqual(self.cache.get('mutant', (2, 1, 0)), (None, {'successes': {1: 0.5}}))
+
+    def test_bigger_runs_are_reused(self):
+        """An unseeded bigger run answers a smaller one, not a seeded one
+        """
+        self.cache.put('mutant', (1, 0, 0), 1000, {'atleast_one': 160})
+        self.cache.put('mutant', (1, 0, 0), 5000, {'atleast_one': 830})
+        self.assertEqual(self.cache.get('mutant', (1, 0, 0), 500)[0], 1000)
+        self.assertIsNone(self.cache.get('mutant', (1, 0, 0), 5001))
+        self.cache.put('mutant', (1, 0, 0), 1000, {'atleast_one': 170}, seed=3)
+        self.assertIsNone(self.cache.get('mutant', (1, 0, 0), 500, seed=3))
+        self.assertEqual(self.cache.get('mutant', (1, 0, 0), 1000, seed=3),
+                         (1000, {'atleast_one': 170}))
+
+    def test_eviction(self):
+        """Least recently used results go first when the cache is full
+        """
+        self.cache.max_bytes = 100
+        self.cache.put('mutant', (1, 0, 0), 10, {'successes': {i: i for i in range(20)}})
+        self.cache.put('mutant', (2, 0, 0), 10, {'successes': {i: i for i in range(20)}})
+        self.assertLessEqual(self.cache.size(), 100)
+        self.assertIsNone(self.cache.get('mutant', (1, 0, 0), 10))
+        self.assertIsNotNone(self.cache.get('mutant', (2, 0, 0), 10))
+
+    def test_lookup(self):
+        """lookup only computes what is not in the cache
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'atleast_one': 1}
+        self.assertEqual(yze.cache.lookup(self.cache, 'alien', (3, 1), 10, None, compute),
+                         (10, {'atleast_one': 1}))
+        yze.cache.lookup(self.cache, 'alien', (3, 1), 10, None, compute)
+        self.assertEqual(len(calls), 1)
+        yze.cache.lookup(None, 'alien', (3, 1), 10, None, compute)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
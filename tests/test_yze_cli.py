@@ -0,0 +1,62 @@
+import contextlib
+import io
+import subprocess
+import sys
+import unittest
+
+import yze.cli
+
+# modules a command must not import, its import time is checked
+# against a budget by benchmarks/bench_yze.py
+HEAVY = ('numpy', 'fractions', 'sqlite3', 'logging', 'pprint', 'argparse', 'asyncio')
+
+
+def import_times(module):
+    """{module: cumulative microseconds} of importing <module> in a new
+    interpreter.
+    """
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in err.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestYZECli(unittest.TestCase):
+    def test_startup(self):
+        """Commands import nothing heavy
+        """
+        for name, (module, description) in yze.cli.COMMANDS.items():
+            if name == 'server':
+                continue
+            times = import_times(module)
+            for heavy in HEAVY:
+                self.assertNotIn(heavy, times, f'{module} imports {heavy}')
+
+    def test_run(self):
+        """Commands run from the multiplexer, errors give a status
+        """
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(yze.cli.run(['mutant', '-a', '2', '-e', '--no-cache']), 0)
+        self.assertIn('at least one success: 30.55', out.getvalue())
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(yze.cli.run(['mutant', '--nope']), 2)
+            self.assertEqual(yze.cli.run(['dnd']), 2)
+
+    def test_stdin(self):
+        """Every query gets its answer then the separator
+        """
+        queries = io.StringIO('step -a B -s C\n\n# comment\nalien -p 2 -e\nmutant -a x\n')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            yze.cli.serve_stdin(queries, separator='END')
+        answers = out.getvalue().split('END\n')
+        self.assertEqual(len(answers), 4)
+        self.assertIn('Pushed roll', answers[0])
+        self.assertIn('Multipushed roll', answers[1])
+        self.assertEqual(answers[2:], ['', ''])
@@ -1,7 +1,13 @@
+import random
 import unittest
 
 import yze.dice
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class TestYZEDice(unittest.TestCase):
     def test_is_int(self):
@@ -26,6 +32,27 @@ class TestYZEDice(unittest.TestCase):
         self.assertTrue(isinstance(sres[0], int))
         self.assertTrue(isinstance(sres[1], int))
 
+    def test_success_tables(self):
+        """Artefact and step dice tables give the successes of each face
+        """
+        self.assertEqual(yze.dice.ARTEFACT_SUCCESSES[12],
+                         (0, 0, 0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4))
+        self.assertEqual(yze.dice.STEP_SUCCESSES[12],
+                         (0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2))
+        self.assertEqual(yze.dice.STEP_SUCCESSES[6][6], 1)
+        with self.assertRaises(TypeError):
+            yze.dice.STEP_SUCCESSES[20] = ()
+        res = yze.dice.StepDie(size=8).throw()
+        self.assertEqual(res[1], yze.dice.STEP_SUCCESSES[8][res[0]])
+
+    def test_bad_sizes(self):
+        """Only YZE die sizes are accepted
+        """
+        with self.assertRaises(ValueError):
+            yze.dice.StepDie(20)
+        with self.assertRaises(ValueError):
+            yze.dice.FBLDicePool(artefact=7)
+
     def test_location(self):
         """Hit Location Die return Leg, Torso, Arm or Head.
         """
@@ -69,6 +96,23 @@ class TestYZEDice(unittest.TestCase):
         fbl.push()
         self.assertTrue(fbl.pushed)
 
+    def test_multipush_first(self):
+        """A multipush right after the throw is the push
+        """
+        fbl = yze.dice.FBLDicePool(attr=2, skill=1, gear=1, rng=random.Random(1))
+        fbl.throw()
+        res = fbl.multipush()
+        self.assertTrue(fbl.pushed)
+        self.assertIs(res, fbl.pushed_res)
+        self.assertEqual(sum(fbl.multipush_distribution().values()), 1)
+        self.assertGreaterEqual(fbl.expected_pushes(), 0)
+        adp = yze.dice.AlienDicePool(pool=2, stress=1, rng=random.Random(1))
+        adp.throw()
+        res = adp.multipush()
+        self.assertIs(res, adp.pushed_res)
+        self.assertEqual(len(res['pool']), 2)
+        self.assertFalse(adp.multipushed)
+
     def test_state_alien(self):
         """AlienDicePool has states: thrown, pushed and multipushed.
         """
@@ -109,6 +153,83 @@ class TestYZEDice(unittest.TestCase):
         br.push()
         self.assertTrue(br.pushed)
 
+    def test_seeded_pools(self):
+        """Pools built with the same seeded RNG give the same results
+        """
+        for pool in (lambda rng: yze.dice.MutantDicePool(3, 2, 1, rng=rng),
+                     lambda rng: yze.dice.FBLDicePool(3, 2, 1, artefact=10, rng=rng),
+                     lambda rng: yze.dice.AlienDicePool(4, 2, rng=rng),
+                     lambda rng: yze.dice.Twilight2000DicePool("B", "C", ammo=3, rng=rng),
+                     lambda rng: yze.dice.BladeRunnerDicePool("A", "C", advantage=True, rng=rng)):
+            first = pool(random.Random(5))
+            second = pool(random.Random(5))
+            self.assertEqual(first.throw(), second.throw())
+            self.assertEqual(first.push(), second.push())
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy_source(self):
+        """A numpy Generator can be used as RNG
+        """
+        first = yze.dice.MutantDicePool(5, 5, 2, rng=np.random.default_rng(3))
+        second = yze.dice.MutantDicePool(5, 5, 2, rng=np.random.default_rng(3))
+        self.assertEqual(first.throw(), second.throw())
+        self.assertTrue(isinstance(first.result['attr'][0], int))
+
+    def test_buffered_source(self):
+        """The buffered source gives every face of a die in range
+        """
+        source = yze.dice.BufferedSource(random.Random(1), block_size=64)
+        d = yze.dice.StepDie(size=10, rng=source)
+        faces = {d.throw()[0] for i in range(1000)}
+        self.assertEqual(faces, set(range(1, 11)))
+
+    def test_face_stream(self):
+        """A FaceStream throws dice of its own size only
+        """
+        stream = yze.dice.FaceStream(8, random.Random(2), block_size=16)
+        faces = stream.faces(500)
+        self.assertEqual(len(faces), 500)
+        self.assertEqual(set(faces), set(range(1, 9)))
+        self.assertEqual(faces, yze.dice.FaceStream(8, random.Random(2), block_size=16).faces(500))
+        d = yze.dice.StepDie(size=8, rng=stream)
+        self.assertTrue(1 <= d.throw()[0] <= 8)
+        with self.assertRaises(ValueError):
+            yze.dice.SimpleDie(size=6, rng=stream).throw()
+        stream = yze.dice.FaceStream(10, random.Random(1), block_size=1)
+        self.assertEqual(len([next(stream) for i in range(500)]), 500)
+
+    def test_dice_result_is_dict_like(self):
+        """Pool results read like the dicts of lists they used to be
+        """
+        res = yze.dice.DiceResult.from_groups(('attr', 'skill'), ([1, 6], [3]), (('artefact', (8, 2)),))
+        self.assertEqual(res['attr'], [1, 6])
+        self.assertEqual(res['skill'], [3])
+        self.assertEqual(res['artefact'], (8, 2))
+        self.assertEqual(res, {'attr': [1, 6], 'skill': [3], 'artefact': (8, 2)})
+        self.assertEqual(list(res), ['attr', 'skill', 'artefact'])
+        self.assertTrue('skill' in res)
+        self.assertFalse('gear' in res)
+        with self.assertRaises(KeyError):
+            res['gear']
+        mdp = yze.dice.MutantDicePool(attr=2, skill=1, gear=1)
+        self.assertEqual(mdp.result, {'attr': [], 'skill': [], 'gear': []})
+        mdp.throw()
+        self.assertEqual(len(mdp.result['attr']), 2)
+        self.assertFalse(hasattr(mdp.result, '__dict__'))
+        self.assertFalse(hasattr(mdp, '__dict__'))
+
+    def test_bad_step_value(self):
+        """Step dice only take A to D
+        """
+        with self.assertRaises(ValueError):
+            yze.dice.Twilight2000DicePool(attr='E', rng=random.Random(1)).throw()
+
+    def test_bad_source(self):
+        """Only known RNG objects are accepted
+        """
+        with self.assertRaises(TypeError):
+            yze.dice.SimpleDie(rng="not a rng")
+
 
 if __name__ == '__main__':
     unittest.main()
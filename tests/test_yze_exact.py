@@ -0,0 +1,161 @@
+import unittest
+from fractions import Fraction
+
+import yze.dice
+import yze.exact
+
+
+class TestYZEExact(unittest.TestCase):
+    def test_distribution_sums_to_one(self):
+        """A pool distribution is a probability distribution
+        """
+        dist = yze.exact.mutant_distribution(3, 2, 1)
+        self.assertEqual(sum(dist.values()), 1)
+
+    def test_neighbour_pools(self):
+        """Pools built from their neighbours match pools built at once
+        """
+        dist = yze.exact.power(yze.exact.mutant_die('attr'), 2)
+        dist = yze.exact.convolve(dist, yze.exact.power(yze.exact.mutant_die('skill'), 3))
+        dist = yze.exact.convolve(dist, yze.exact.power(yze.exact.mutant_die('gear'), 2))
+        self.assertEqual(yze.exact.mutant_distribution(2, 3, 2), dist)
+
+    def test_one_attribute_die(self):
+        """One attribute die: 6 once, or 6 and 1 when pushed
+        """
+        dist = yze.exact.mutant_distribution(1, 0, 0)
+        self.assertEqual(yze.exact.marginal(dist, 0)[1], Fraction(1, 6))
+        self.assertEqual(yze.exact.marginal(dist, 1)[1], Fraction(10, 36))
+        self.assertEqual(yze.exact.marginal(dist, 2)[1], Fraction(10, 36))
+        self.assertEqual(yze.exact.marginal(dist, 3), {0: 1})
+
+    def test_skill_dice_never_botch(self):
+        """Skill dice are only rerolled, 1s are not counted
+        """
+        dist = yze.exact.mutant_distribution(0, 2, 0)
+        self.assertEqual(yze.exact.marginal(dist, 2), {0: 1})
+        self.assertEqual(yze.exact.marginal(dist, 1)[0], Fraction(25, 36) ** 2)
+
+    def test_results_shape(self):
+        """mutant_results has the same keys as multiple_throws
+        """
+        res = yze.exact.mutant_results(2, 1, 1)
+        self.assertAlmostEqual(res['atleast_one'], 1 - (5 / 6) ** 4)
+        self.assertEqual(sorted(res['gear_botched']), [1])
+        self.assertEqual(sorted(res['successes']), [1, 2, 3, 4])
+
+    def test_push_state_ignores_order(self):
+        """Push odds only depend on locked and rerolled dice counts
+        """
+        self.assertEqual(yze.exact.mutant_push_state([2, 5, 3], [4, 5], [3, 2]),
+                         (3, 2, 2, 0, 0, 0))
+        self.assertEqual(yze.exact.mutant_push_state([6, 1, 3], [6], [1]),
+                         yze.exact.mutant_push_state([3, 1, 6], [6], [1]))
+
+    def test_push_odds_locked_dice(self):
+        """Locked dice are always counted after the push
+        """
+        dist = yze.exact.mutant_push_odds(0, 0, 0, 2, 1, 1)
+        self.assertEqual(dist, {(2, 1, 1): 1})
+        res = yze.exact.mutant_push_results([2], [], [])
+        self.assertAlmostEqual(res['atleast_one_pushed'], 1 / 6)
+        self.assertAlmostEqual(res['attribute_botched'][1], 1 / 6)
+
+    def test_fbl_push_matches_mutant(self):
+        """A pushed FBL pool has the same odds as a pushed Mutant pool
+        """
+        mutant = yze.exact.mutant_distribution(3, 2, 1)
+        fbl = yze.exact.fbl_distribution(3, 2, 1, pushes=1)
+        self.assertEqual(yze.exact.marginal(fbl, 0), yze.exact.marginal(mutant, 1))
+        self.assertEqual(yze.exact.marginal(fbl, 1), yze.exact.marginal(mutant, 2))
+
+    def test_fbl_artefact(self):
+        """Artefact dice give up to 4 successes and lock on success
+        """
+        dist = yze.exact.fbl_distribution(0, 0, 0, artefact=12)
+        self.assertEqual(yze.exact.marginal(dist, 0),
+                         {0: Fraction(5, 12), 1: Fraction(2, 12), 2: Fraction(2, 12),
+                          3: Fraction(2, 12), 4: Fraction(1, 12)})
+        pushed = yze.exact.fbl_distribution(0, 0, 0, artefact=8, pushes=1)
+        self.assertEqual(yze.exact.marginal(pushed, 0)[0], Fraction(5, 8) ** 2)
+
+    def test_fbl_multipush(self):
+        """Every dwarf push makes a success more likely
+        """
+        odds = [yze.exact.fbl_results(2, 1, 1, artefact=10, pushes=k)['atleast_one']
+                for k in range(5)]
+        self.assertEqual(odds, sorted(odds))
+        dist = yze.exact.fbl_distribution(1, 0, 0, pushes=50)
+        self.assertAlmostEqual(float(yze.exact.marginal(dist, 0)[1]), 0.5)
+        self.assertEqual(sum(dist.values()), 1)
+
+    def test_fbl_chain(self):
+        """The multipush chain from no die thrown is a fresh pool, and
+        its limit is reached by pushing on
+        """
+        fresh = ((0, 0, 3), (0, 0, 2), (0, 0, 1))
+        for pushes in range(3):
+            self.assertEqual(yze.exact.fbl_chain_distribution(fresh, (10, 0), pushes + 1),
+                             yze.exact.fbl_distribution(3, 2, 1, 10, pushes))
+        states, artefact = yze.exact.fbl_push_state([6, 1, 3], [1, 2], [4], (8, 7))
+        self.assertEqual(states, ((1, 1, 1), (0, 0, 2), (0, 0, 1)))
+        limit = yze.exact.fbl_chain_distribution(states, artefact)
+        self.assertEqual(sum(limit.values()), 1)
+        self.assertEqual(yze.exact.marginal(limit, 0)[4], Fraction(1, 4))
+        far = yze.exact.fbl_chain_distribution(states, artefact, 60)
+        for k, p in limit.items():
+            self.assertAlmostEqual(float(far[k]), float(p), places=4)
+
+    def test_fbl_expected_pushes(self):
+        """A free die locks after 3 pushes, or 6 when only 6 locks it
+        """
+        self.assertEqual(yze.exact.fbl_expected_pushes(((0, 0, 1), (0, 0, 0), (0, 0, 0))), 3)
+        self.assertEqual(yze.exact.fbl_expected_pushes(((0, 0, 0), (0, 0, 1), (0, 0, 0))), 6)
+        self.assertEqual(yze.exact.fbl_expected_pushes(((0, 0, 0), (0, 0, 0), (0, 0, 0)), (8, 0)),
+                         Fraction(8, 3))
+        self.assertEqual(yze.exact.fbl_expected_pushes(((2, 1, 0), (1, 0, 0), (0, 1, 0)), (8, 0)), Fraction(8, 3))
+        self.assertGreater(yze.exact.fbl_expected_pushes(((0, 0, 1), (0, 0, 1), (0, 0, 0))), 6)
+
+    def test_spec_distribution(self):
+        """Pool distributions and the game functions built on the
+        generic engine agree
+        """
+        for pushes in range(3):
+            self.assertEqual(yze.dice.FBLDicePool(3, 2, 1).distribution(pushes),
+                             yze.exact.fbl_distribution(3, 2, 1, pushes=pushes))
+            self.assertEqual(yze.dice.AlienDicePool(2, 2).distribution(pushes),
+                             yze.exact.alien_distribution(2, 2, pushes))
+        self.assertEqual(yze.dice.MutantDicePool(2, 1, 1).distribution(1),
+                         yze.exact.fbl_distribution(2, 1, 1, pushes=1))
+
+    def test_step_die(self):
+        """Step dice succeed on 6+, twice on 10+, pushed when failing
+        """
+        self.assertEqual(yze.exact.step_die("D"), {(0,): Fraction(5, 6), (1,): Fraction(1, 6)})
+        pushed = yze.exact.step_die("A", pushed=True)
+        self.assertEqual(pushed[(0,)], Fraction(5, 12) ** 2)
+        even_one = yze.exact.step_die("A", pushed=True, push_below=2)
+        self.assertEqual(even_one[(2,)], Fraction(3, 12) + Fraction(9, 12) * Fraction(3, 12))
+
+    def test_blade_runner_advantage(self):
+        """Advantage adds a die, disadvantage keeps only one
+        """
+        adv = yze.exact.blade_runner_distribution("A", "C", advantage=True)
+        self.assertEqual(max(k for (k,) in adv), 2 + 1 + 1)
+        disadv = yze.exact.blade_runner_distribution("A", "C", advantage=False)
+        self.assertEqual(disadv, yze.exact.step_die("C"))
+
+    def test_step_odds_table(self):
+        """Step odds are served from the table once computed
+        """
+        odds = yze.exact.step_odds('t2k', 'B', None, 2, 'push')
+        self.assertIs(odds, yze.exact.step_odds('t2k', 'B', None, 2, 'push'))
+        self.assertAlmostEqual(odds['jam'], 1 - (26 / 36) ** 2)
+        self.assertAlmostEqual(odds['ammo_hits'][2], (10 / 36) ** 2)
+        with self.assertRaises(ValueError):
+            yze.exact.step_odds('t2k', 'B', None, 2, 'even_one_success')
+        self.assertIn(('blade_runner', 'A', 'D', False, 'push'), yze.exact.step_table())
+
+
+if __name__ == '__main__':
+    unittest.main()
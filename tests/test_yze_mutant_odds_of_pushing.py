@@ -0,0 +1,57 @@
+import io
+import json
+import unittest
+
+import yze.exact
+import yze.mutant_odds_of_pushing as pushing
+
+
+class TestMutantOddsOfPushing(unittest.TestCase):
+    def setUp(self):
+        pushing.MEMO.clear()
+
+    def test_state_roll(self):
+        """A roll rebuilt from its push state has the same state
+        """
+        state = yze.exact.mutant_push_state([2, 6, 1], [6, 4], [1, 3])
+        self.assertEqual(yze.exact.mutant_push_state(*pushing.state_roll(state)), state)
+
+    def test_memo(self):
+        """Rolls with the same dice in another order share their odds
+        """
+        first = pushing.push_odds([2, 5, 3], [4, 5], [3, 2], exact_odds=True)
+        self.assertEqual(len(pushing.MEMO), 1)
+        self.assertIs(pushing.push_odds([5, 3, 2], [5, 4], [2, 3], exact_odds=True), first)
+        self.assertEqual(len(pushing.MEMO), 1)
+
+    def test_simulated(self):
+        """Simulated odds push the given roll and get close to the
+        exact ones
+        """
+        simulated = pushing.percent_results(*pushing.push_odds([2, 5, 3], [4, 5], [3, 2], throws=20000))
+        exact = pushing.percent_results(*pushing.push_odds([2, 5, 3], [4, 5], [3, 2], exact_odds=True))
+        for key in pushing.ODDS_KEYS:
+            self.assertAlmostEqual(simulated[key], exact[key], delta=2)
+
+    def test_jsonl_batch(self):
+        """Every roll gets a line, bad ones an error
+        """
+        rolls = io.StringIO('{"attribute": "253", "skill": "45", "gear": "32"}\n\n'
+                            '{"attribute": [6, 1]}\n{"attribute": "9"}\n')
+        out = io.StringIO()
+        pushing.batch(rolls, out, exact_odds=True)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertAlmostEqual(lines[0]['atleast_one_pushed'], 72.0918, places=3)
+        self.assertEqual(lines[1]['atleast_one_pushed'], 100)
+        self.assertEqual(lines[2]['line'], 4)
+
+    def test_tsv_batch(self):
+        """A header line is skipped, missing groups are empty
+        """
+        rolls = io.StringIO('attribute\tskill\tgear\n253\t45\t32\n11\n')
+        out = io.StringIO()
+        pushing.batch(rolls, out, 'tsv', exact_odds=True)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2].split('\t')[:5], ['11', '', '', '0.0', '100.0'])
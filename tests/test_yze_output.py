@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import yze.output
+from yze.benchmark_mutant import complete_columns, complete_configs, count_sizes, main, print_complete_list
+
+
+class TestYZEOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_formats(self):
+        """Empty cells, margins and every format
+        """
+        for fmt, expected in [('tsv', 'a\tb\tc\n1\t\t2.5±0.100\n'),
+                              ('csv', 'a,b,c\n1,,2.5±0.100\n'),
+                              ('jsonl', '{"a": 1, "c": 2.5, "margins": {"c": 0.1}}\n')]:
+            stream = io.StringIO()
+            writer = yze.output.RowWriter(stream, ['a', 'b', 'c'], fmt)
+            writer.write_header()
+            writer.write([1, None, 2.5], [None, None, 0.1])
+            self.assertEqual(stream.getvalue(), expected)
+        with self.assertRaises(ValueError):
+            yze.output.RowWriter(io.StringIO(), ['a'], 'xml')
+
+    def test_resume(self):
+        """An interrupted list is completed without throwing again the
+        pools already written
+        """
+        for fmt in yze.output.FORMATS:
+            full = os.path.join(self.tmp.name, f'full.{fmt}')
+            cut = os.path.join(self.tmp.name, f'cut.{fmt}')
+            print_complete_list(1000, seed=5, output=full, fmt=fmt)
+            with open(full) as f:
+                lines = f.readlines()
+            with open(cut, 'w') as f:
+                f.writelines(lines[:11])
+                f.write(lines[11][:8])
+            done = yze.output.read_done(cut, fmt, complete_columns(count_sizes(complete_configs()))[:3])
+            self.assertEqual(len(done), 11 if fmt == 'jsonl' else 10)
+            print_complete_list(1000, seed=5, output=cut, fmt=fmt, resume=True)
+            with open(cut) as f:
+                self.assertEqual(f.readlines(), lines)
+        with open(os.path.join(self.tmp.name, 'full.jsonl')) as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 90)
+
+    def test_resume_other_columns(self):
+        """A file of another list or format is not resumed
+        """
+        path = os.path.join(self.tmp.name, 'list.tsv')
+        configs = complete_configs(range(1, 2), range(0, 1), range(0, 2))
+        print_complete_list(1000, seed=5, output=path, configs=configs)
+        with open(path) as f:
+            written = f.read()
+        with self.assertRaises(yze.output.ResumeError):
+            print_complete_list(1000, seed=5, output=path, resume=True,
+                                configs=complete_configs(range(1, 2), range(0, 1), range(0, 5)))
+        for fmt in ('csv', 'jsonl'):
+            with self.assertRaises(yze.output.ResumeError):
+                print_complete_list(1000, seed=5, output=path, fmt=fmt, resume=True, configs=configs)
+        with open(path) as f:
+            self.assertEqual(f.read(), written)
+        with self.assertRaises(SystemExit):
+            main(['-c', '-t', '1000', '--gears', '0-4', '--attributes', '1-1', '--skills', '0-0',
+                  '--no-cache', '-o', path, '--resume'])
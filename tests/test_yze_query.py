@@ -0,0 +1,68 @@
+import unittest
+from fractions import Fraction
+
+import yze.dice
+import yze.exact
+import yze.query
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestYZEQuery(unittest.TestCase):
+    def test_exact_conditional(self):
+        """Odds given the first roll are the odds of pushing it
+        """
+        table = yze.query.pool_table(yze.dice.MutantDicePool(attr=2))
+        pushed = yze.exact.mutant_push_results([6, 3], [], [])
+        self.assertAlmostEqual(float(table.probability(pushed_successes=2, successes=1, attr_botches=0)),
+                               pushed['pushed_successes'][2])
+        self.assertEqual(table.probability(pushed_attr_botches=(1, None), attr_botches=1), 1)
+        self.assertEqual(table.marginal('pushed_successes', successes=(None, 0), attr_botches=0),
+                         {0: Fraction(25, 36), 1: Fraction(10, 36), 2: Fraction(1, 36)})
+
+    def test_marginals(self):
+        """Features of the first roll and after the pushes have the
+        odds of the spec engine, unknown features are refused
+        """
+        table = yze.query.pool_table(yze.dice.AlienDicePool(pool=2, stress=1), pushes=2)
+        self.assertEqual(table.names, ('successes', 'stress_ones', 'pushed_successes', 'pushed_stress_ones'))
+        dist = yze.exact.alien_distribution(2, 1, 2)
+        self.assertEqual(table.marginal('pushed_successes'), yze.exact.marginal(dist, 0))
+        self.assertEqual(table.probability(successes=0), Fraction(25, 36) * Fraction(5, 6))
+        self.assertIsNone(table.probability(pushed_successes=1, successes=9))
+        with self.assertRaises(KeyError):
+            table.given(artefact=1)
+
+    def test_artefact(self):
+        """The artefact die of a Forbidden Lands pool is in its table
+        """
+        table = yze.query.pool_table(yze.dice.FBLDicePool(attr=2, skill=1, artefact=12))
+        for pushes, name in ((0, 'successes'), (1, 'pushed_successes')):
+            dist = yze.exact.fbl_distribution(2, 1, 0, 12, pushes)
+            self.assertEqual(table.marginal(name), yze.exact.marginal(dist, 0))
+        self.assertAlmostEqual(float(table.probability(successes=(1, None))), 0.759, places=3)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_simulated(self):
+        """Simulated tables count rolls and get close to exact odds
+        """
+        pool = yze.dice.MutantDicePool(attr=3, skill=2, gear=1)
+        sampled = yze.query.pool_table(pool, throws=50000, rng=1)
+        self.assertEqual(sampled.total, 50000)
+        exact = yze.query.pool_table(pool)
+        for successes in range(3):
+            self.assertAlmostEqual(sampled.probability(pushed_successes=(1, None), successes=successes),
+                                   float(exact.probability(pushed_successes=(1, None), successes=successes)),
+                                   delta=0.02)
+        pool = yze.dice.FBLDicePool(attr=2, skill=1, artefact=12)
+        sampled = yze.query.pool_table(pool, throws=50000, rng=1)
+        self.assertAlmostEqual(sampled.probability(pushed_successes=(1, None)),
+                               float(yze.query.pool_table(pool).probability(pushed_successes=(1, None))),
+                               delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
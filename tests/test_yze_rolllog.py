@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+import yze.dice
+
+try:
+    import numpy as np
+    import yze.batch
+    import yze.query
+    import yze.rolllog
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestYZERollLog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'rolls.log')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        """The log holds the faces the batch engine rolled, in chunks
+        """
+        pool = yze.dice.MutantDicePool(attr=3, skill=2, gear=1)
+        yze.rolllog.write_log(self.path, pool, 1000, pushes=1, rng=7, chunk=300)
+        rng = np.random.default_rng(7)
+        thrown = yze.batch.throw_faces(300, 6, rng)
+        pushed = yze.batch.mutant_push(thrown, 3, 2, 1, rng)
+        with yze.rolllog.RollLog(self.path) as log:
+            self.assertEqual(len(log), 1000)
+            self.assertEqual(log.sizes, (3, 2, 1))
+            self.assertTrue((log.level(0)[:300] == thrown).all())
+            self.assertTrue((log.level(1)[:300] == pushed).all())
+            self.assertTrue((log.group('gear', 1)[:300] == pushed[:, 5:]).all())
+            counts = log.counts(1, slice(0, 300))
+            self.assertTrue((counts['attr_botches'] == yze.batch.mutant_counts(pushed, 3, 2, 1)['attr_botches']).all())
+            self.assertEqual(yze.query.log_table(log).total, 1000)
+
+    def test_views(self):
+        """Faces are read only views of the mapped file
+        """
+        yze.rolllog.write_log(self.path, yze.dice.AlienDicePool(pool=2, stress=1), 50, pushes=2, rng=1)
+        log = yze.rolllog.RollLog(self.path)
+        self.assertEqual(log.widths, [3, 4, 5])
+        self.assertEqual(log.faces.shape, (50, 12))
+        self.assertFalse(log.faces.flags.owndata)
+        self.assertFalse(log.faces.flags.writeable)
+        self.assertEqual(log.group('stress', 2).shape, (50, 3))
+        log.close()
+        self.assertIsNone(log.faces)
+
+    def test_artefact(self):
+        """The artefact die is logged as a group of one die with its
+        successes table
+        """
+        pool = yze.dice.FBLDicePool(attr=2, skill=1, artefact=12)
+        yze.rolllog.write_log(self.path, pool, 200, pushes=1, rng=3)
+        rng = np.random.default_rng(3)
+        pushed = pool.push_many(pool.throw_many(200, rng), rng)
+        with yze.rolllog.RollLog(self.path) as log:
+            self.assertEqual(log.spec, pool.pool_spec()[0])
+            self.assertEqual(log.sizes, (2, 1, 0, 1))
+            self.assertEqual(log.group('artefact', 1).shape, (200, 1))
+            self.assertTrue((log.level(1) == pushed).all())
+            self.assertTrue((log.counts(1)['successes'] == pool.count_many(pushed)['successes']).all())
+
+    def test_partial_record(self):
+        """A record cut short is left out, other files are refused
+        """
+        yze.rolllog.write_log(self.path, yze.dice.MutantDicePool(attr=2), 10, rng=1)
+        with open(self.path, 'ab') as stream:
+            stream.write(b'\x06')
+        with yze.rolllog.RollLog(self.path) as log:
+            self.assertEqual(len(log), 10)
+        with open(self.path, 'wb') as stream:
+            stream.write(b'not a log')
+        with self.assertRaises(ValueError):
+            yze.rolllog.RollLog(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import random
+import unittest
+
+from yze import stats
+from yze.server import RollError, RollServer, RollService, SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestYZEServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = RollService(rng=random.Random(3))
+        self.server = RollServer(self.service)
+        self.tcp = await self.server.start('127.0.0.1', 0)
+        self.port = self.tcp.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.sweeper.cancel()
+        self.tcp.close()
+        await self.tcp.wait_closed()
+
+    async def request(self, method, path, body=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        data = json.dumps(body).encode() if body is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+                     "Connection: close\r\n\r\n".encode() + data)
+        status = int((await reader.readline()).split()[1])
+        while (await reader.readline()) != b'\r\n':
+            pass
+        payload = json.loads(await reader.read())
+        writer.close()
+        return status, payload
+
+    async def test_throw_and_push(self):
+        """Every pool type can be thrown then pushed through HTTP
+        """
+        for body in [{'type': 'mutant', 'attr': 3, 'skill': 2, 'gear': 1},
+                     {'type': 'fbl', 'attr': 2, 'artefact': 8},
+                     {'type': 'alien', 'pool': 4, 'stress': 1},
+                     {'type': 't2k', 'attr': 'B', 'skill': 'C', 'ammo': 3},
+                     {'type': 'blade_runner', 'attr': 'A', 'skill': 'D', 'advantage': True}]:
+            status, thrown = await self.request('POST', '/pools', body)
+            self.assertEqual(status, 201)
+            status, pushed = await self.request('POST', f"/pools/{thrown['id']}/push")
+            self.assertEqual(status, 200)
+            self.assertEqual(pushed['id'], thrown['id'])
+            self.assertEqual(set(pushed['result']), set(thrown['result']))
+        status, multipushed = await self.request('POST', f"/pools/{thrown['id']}/multipush")
+        self.assertEqual(status, 400)
+        status, got = await self.request('GET', f"/pools/{thrown['id']}")
+        self.assertEqual(got['result'], pushed['result'])
+
+    async def test_errors(self):
+        """Bad requests get an error and a status
+        """
+        self.assertEqual((await self.request('POST', '/pools', {'type': 'dnd'}))[0], 400)
+        self.assertEqual((await self.request('POST', '/pools', {'type': 'mutant', 'attr': 1000}))[0], 400)
+        self.assertEqual((await self.request('POST', '/pools', {'type': ['mutant']}))[0], 400)
+        self.assertEqual((await self.request('POST', '/pools', {'type': 'fbl', 'artefact': 8.0}))[0], 400)
+        self.assertEqual((await self.request('POST', '/pools/nope/push'))[0], 404)
+        self.assertEqual((await self.request('GET', '/pools'))[0], 405)
+        self.assertEqual((await self.request('GET', '/elsewhere'))[0], 404)
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b"POST /pools HTTP/1.1\r\nContent-Length: many\r\n\r\n")
+        self.assertEqual((await reader.readline()).split()[1], b'400')
+        writer.close()
+
+    async def test_stats(self):
+        """Counts are served when instrumentation is on
+        """
+        stats.enable()
+        try:
+            await self.request('POST', '/pools', {'type': 'mutant', 'attr': 2})
+            status, payload = await self.request('GET', '/stats')
+        finally:
+            stats.disable()
+            stats.reset()
+        self.assertTrue(payload['enabled'])
+        self.assertEqual(payload['calls']['MutantDicePool']['throw'], 1)
+        self.assertEqual(payload['dice']['6'], 2)
+
+    async def test_batch(self):
+        """A batch goes on after a failed request
+        """
+        status, thrown = await self.request('POST', '/pools', {'type': 'alien', 'pool': 2})
+        status, payload = await self.request('POST', '/batch', {'requests': [
+            {'op': 'push', 'id': thrown['id']},
+            {'op': 'throw', 'type': 'unknown'},
+            {'op': 'get', 'id': [1]},
+            {'op': 'multipush', 'id': thrown['id']},
+        ]})
+        responses = payload['responses']
+        self.assertEqual(responses.pop(2)['status'], 400)
+        self.assertEqual(len(responses[0]['result']['stress']), 1)
+        self.assertEqual(responses[1]['status'], 400)
+        self.assertEqual(len(responses[2]['result']['stress']), 2)
+
+    async def test_feed(self):
+        """Rolls are streamed to the feed
+        """
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b"GET /feed HTTP/1.1\r\n\r\n")
+        while (await reader.readline()) != b'\r\n':
+            pass
+        await asyncio.sleep(0.05)
+        status, thrown = await self.request('POST', '/pools', {'type': 'mutant', 'attr': 2})
+        line = await asyncio.wait_for(reader.readline(), 5)
+        event = json.loads(line[len(b'data: '):])
+        self.assertEqual(event['op'], 'throw')
+        self.assertEqual(event['id'], thrown['id'])
+        writer.close()
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_ttl(self):
+        """Unused pools expire, used ones are kept alive
+        """
+        clock = FakeClock()
+        store = SessionStore(ttl=10, clock=clock)
+        old = store.add('old')
+        used = store.add('used')
+        clock.now = 8
+        self.assertEqual(store.get(used), 'used')
+        clock.now = 12
+        with self.assertRaises(RollError):
+            store.get(old)
+        self.assertEqual(store.get(used), 'used')
+        self.assertEqual(len(store), 1)
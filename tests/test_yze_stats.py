@@ -0,0 +1,68 @@
+import random
+import unittest
+
+import yze.dice
+import yze.stats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestYZEStats(unittest.TestCase):
+    def setUp(self):
+        yze.stats.reset()
+
+    def tearDown(self):
+        yze.stats.disable()
+        yze.stats.reset()
+
+    def test_counts(self):
+        """Dice per size and calls per pool class and method
+        """
+        events = []
+        yze.stats.enable(hook=events.append)
+        d = yze.dice.FBLDicePool(attr=2, skill=1, artefact=8, rng=random.Random(1))
+        d.throw()
+        d.push()
+        yze.dice.BladeRunnerDicePool('A', 'C', rng=random.Random(1)).throw()
+        snap = yze.stats.snapshot()
+        self.assertEqual(snap['calls']['FBLDicePool'], {'throw': 1, 'push': 1})
+        self.assertEqual(snap['calls']['BladeRunnerDicePool'], {'throw': 1})
+        self.assertEqual(snap['dice'][12], 1)
+        self.assertIn(snap['dice'][8], (2, 3))
+        self.assertGreaterEqual(snap['dice'][6], 3)
+        self.assertEqual(sum(snap['latency']['FBLDicePool']['push'].values()), 1)
+        self.assertEqual([e['method'] for e in events], ['throw', 'push', 'throw'])
+
+    def test_disabled_is_untouched(self):
+        """Disabling puts the original methods back
+        """
+        throw = yze.dice.MutantDicePool.throw
+        face = yze.dice.RandomSource.face
+        yze.stats.enable()
+        self.assertIsNot(yze.dice.MutantDicePool.throw, throw)
+        yze.stats.disable()
+        self.assertIs(yze.dice.MutantDicePool.throw, throw)
+        self.assertIs(yze.dice.RandomSource.face, face)
+        yze.dice.MutantDicePool(3).throw()
+        self.assertEqual(yze.stats.snapshot(), {'dice': {}, 'calls': {}, 'latency': {}})
+
+    def test_buffered_dice(self):
+        """Dice drawn from a buffer are counted once
+        """
+        yze.stats.enable()
+        source = yze.dice.BufferedSource(random.Random(2))
+        yze.dice.AlienDicePool(pool=4, stress=2, rng=source).throw()
+        yze.dice.FaceStream(10, random.Random(2)).faces(7)
+        self.assertEqual(yze.stats.snapshot()['dice'], {6: 6, 10: 7})
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_batch_dice(self):
+        """Dice of the batch engine are counted
+        """
+        yze.stats.enable()
+        pool = yze.dice.MutantDicePool(2, 1, 1)
+        pool.push_many(pool.throw_many(100, rng=3), rng=4)
+        self.assertEqual(yze.stats.snapshot()['dice'], {6: 800})